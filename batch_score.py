@@ -0,0 +1,229 @@
+"""Score CSV or Parquet files of lab reports without the Streamlit UI.
+
+    python batch_score.py diabetes reports.csv predictions.csv --chunk-size 50000
+
+The input is read in fixed-size chunks, each chunk becomes one contiguous
+float64 array in the model's column order (see ``features.SCHEMAS``), is
+range checked as a whole and is scored with a single ``predict`` call.
+Results are written as soon as a chunk is done, so memory use does not grow
+with the size of the file.
+"""
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from features import SCHEMAS
+from model_registry import get_model
+from prediction_cache import cache as prediction_cache
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def is_parquet(path):
+    """True if ``path`` has a Parquet extension."""
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def import_parquet():
+    """Import pyarrow, or raise RuntimeError saying how to install it."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Reading or writing Parquet files requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _column_index(header, columns, path):
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    return [header.index(c) for c in columns]
+
+
+def _to_array(rows, first_row):
+    try:
+        return np.array(rows, dtype=np.float64)
+    except ValueError as e:
+        raise ValueError(f"Non-numeric value in rows {first_row}-{first_row + len(rows) - 1}: {e}")
+
+
+def iter_csv_chunks(path, columns, chunk_size=DEFAULT_CHUNK_SIZE, id_column=None, allow_missing=False):
+    """Yield ``(ids, X)`` for every ``chunk_size`` rows of a CSV file.
+
+    Empty cells are an error unless ``allow_missing`` is set, in which case
+    they become NaN.
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        index = _column_index(header, columns, path)
+        id_index = _column_index(header, [id_column], path)[0] if id_column else None
+        needed = max(index + ([id_index] if id_index is not None else [])) + 1
+
+        first_row = 0
+        ids, rows = [], []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < needed:
+                raise ValueError(f"Row {first_row + len(rows)} of {path} has {len(row)} cells, "
+                                 f"expected {len(header)}")
+            ids.append(row[id_index] if id_index is not None else first_row + len(rows))
+            values = [row[i] for i in index]
+            if allow_missing:
+                values = [v if v.strip() else 'nan' for v in values]
+            rows.append(values)
+            if len(rows) == chunk_size:
+                yield ids, _to_array(rows, first_row)
+                first_row += len(rows)
+                ids, rows = [], []
+        if rows:
+            yield ids, _to_array(rows, first_row)
+
+
+def iter_parquet_chunks(path, columns, chunk_size=DEFAULT_CHUNK_SIZE, id_column=None, allow_missing=False):
+    """Yield ``(ids, X)`` for every ``chunk_size`` rows of a Parquet file.
+
+    Nulls are an error unless ``allow_missing`` is set, in which case they
+    become NaN.
+    """
+    pyarrow = import_parquet()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    read_columns = list(columns) + ([id_column] if id_column else [])
+    _column_index(parquet_file.schema_arrow.names, read_columns, path)
+
+    first_row = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=read_columns):
+        X = np.empty((batch.num_rows, len(columns)), dtype=np.float64)
+        for j, column in enumerate(columns):
+            values = batch.column(column)
+            if values.null_count and not allow_missing:
+                raise ValueError(f"Missing {column} values in rows {first_row}-{first_row + batch.num_rows - 1}")
+            X[:, j] = values.to_numpy(zero_copy_only=False)
+        if id_column:
+            ids = batch.column(id_column).to_pylist()
+        else:
+            ids = range(first_row, first_row + batch.num_rows)
+        first_row += batch.num_rows
+        yield ids, X
+
+
+class _CsvWriter:
+    def __init__(self, path, id_name):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([id_name, 'prediction'])
+
+    def write(self, ids, predictions):
+        self._writer.writerows(zip(ids, predictions.tolist()))
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, id_name):
+        self._pyarrow = import_parquet()
+        self._path = path
+        self._id_name = id_name
+        self._writer = None
+
+    def write(self, ids, predictions):
+        pa = self._pyarrow
+        table = pa.table({self._id_name: list(ids), 'prediction': predictions})
+        if self._writer is None:
+            self._writer = pa.parquet.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(disease, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+               id_column=None, progress=None, invalid='error', cache=None):
+    """Score every row of ``input_path`` with the ``disease`` model.
+
+    Rows outside the schema's bounds or with empty cells raise ``ValueError``
+    when ``invalid`` is ``'error'`` and are left out of the output when it is
+    ``'skip'``. When it is ``'keep'`` out-of-range rows are scored anyway, but
+    rows with empty cells are still left out since they cannot be scored. With
+    a ``cache`` (``prediction_cache.PredictionCache``) only rows it has not
+    seen are scored.
+
+    Returns ``(scored, skipped, seconds)``. ``progress``, if given, is called
+    with the running count of scored rows after each chunk.
+    """
+    if disease not in SCHEMAS:
+        raise KeyError(f"Unknown model: {disease}")
+    schema = SCHEMAS[disease]
+    model = get_model(disease)
+
+    read = iter_parquet_chunks if is_parquet(input_path) else iter_csv_chunks
+    writer_cls = _ParquetWriter if is_parquet(output_path) else _CsvWriter
+    writer = writer_cls(output_path, id_column or 'row')
+
+    rows = scored = 0
+    start = time.perf_counter()
+    try:
+        for ids, X in read(input_path, schema.columns, chunk_size, id_column,
+                           allow_missing=invalid != 'error'):
+            if invalid == 'error':
+                schema.validate(X, first_row=rows)
+            rows += len(X)
+            if invalid != 'error':
+                skip = schema.invalid_rows(X) if invalid == 'skip' else np.isnan(X).any(axis=1)
+                if skip.any():
+                    ids = [i for i, s in zip(ids, skip) if not s]
+                    X = X[~skip]
+            if len(X):
+                writer.write(ids, cache.predict(disease, X) if cache is not None else model.predict(X))
+            scored += len(X)
+            if progress is not None:
+                progress(scored)
+    finally:
+        writer.close()
+    return scored, rows - scored, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of lab reports.")
+    parser.add_argument('disease', choices=sorted(SCHEMAS))
+    parser.add_argument('input', help="CSV or Parquet file with one lab report per row")
+    parser.add_argument('output', help="where to write predictions (.csv or .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows scored per predict call (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--id-column', help="input column copied to the output to identify each row")
+    parser.add_argument('--invalid', choices=['error', 'skip', 'keep'], default='error',
+                        help="what to do with rows outside the allowed ranges (default error)")
+    parser.add_argument('--cache', action='store_true',
+                        help="reuse predictions for rows already scored (persistent if MDPS_CACHE_DB is set)")
+    parser.add_argument('--quiet', action='store_true', help="do not report progress")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    def progress(rows):
+        print(f"\r{rows} rows scored", end='', file=sys.stderr, flush=True)
+
+    try:
+        scored, skipped, seconds = score_file(args.disease, args.input, args.output, args.chunk_size,
+                                              args.id_column, None if args.quiet else progress, args.invalid,
+                                              prediction_cache if args.cache else None)
+    except (OSError, RuntimeError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    rate = scored / seconds if seconds > 0 else float('inf')
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Scored {scored} rows in {seconds:.2f}s ({rate:,.0f} rows/sec)"
+          + (f", skipped {skipped} invalid rows" if skipped else ''), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
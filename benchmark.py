@@ -0,0 +1,246 @@
+"""Reproducible inference benchmarks for the three disease models.
+
+    python benchmark.py run -o results.json
+    python benchmark.py compare baseline.json results.json --threshold 0.10
+
+``run`` scores seeded synthetic inputs drawn from each feature's documented
+normal range (``features.SCHEMAS``) and records single-row predict latency,
+batched throughput from 1 to 100k rows, model load time, module import time
+and peak RSS, for both the compiled NumPy models and the pickled sklearn
+ones. Every number is also stored under a flat metric name so that
+``compare`` can flag anything that got worse by more than the threshold
+(throughput going down, everything else going up). It exits with status 1
+when there are regressions.
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from compiled_model import LinearModel, compiled_path
+from features import SCHEMAS
+from model_registry import BASE_DIR, ModelRegistry
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+MODULES = ['features', 'model_registry', 'batch_score', 'inference_server', 'mdps_public']
+# Metrics ending in one of these are better when they are larger
+HIGHER_IS_BETTER = ('rows_per_sec',)
+
+
+def synthetic_inputs(schema, rows, seed=0):
+    """Random rows inside each feature's documented normal range."""
+    rng = np.random.default_rng(seed)
+    lows, highs = [], []
+    for f in schema.features:
+        # Feature checks that every normal range lies inside the input bounds
+        low, high = f.normal if f.normal is not None else (f.min_value, f.max_value)
+        lows.append(low)
+        highs.append(high)
+    X = rng.uniform(lows, highs, size=(rows, len(schema)))
+    ints = [i for i, f in enumerate(schema.features) if f.dtype is int]
+    X[:, ints] = np.round(X[:, ints])
+    return np.ascontiguousarray(X)
+
+
+def _percentiles(samples):
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {'p50_us': p50 * 1e6, 'p99_us': p99 * 1e6, 'mean_us': float(np.mean(samples)) * 1e6}
+
+
+def single_row_latency(model, X, repeat):
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        row = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        model.predict(row)
+        samples[i] = time.perf_counter() - start
+    return _percentiles(samples)
+
+
+def batch_throughput(model, X, batch_sizes, min_seconds):
+    results = {}
+    for size in batch_sizes:
+        batch = X[:size]
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            model.predict(batch)
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        results[str(size)] = {'rows_per_sec': calls * size / elapsed, 'call_us': elapsed / calls * 1e6}
+    return results
+
+
+def _subprocess_seconds(code):
+    """Run ``code`` in a fresh interpreter; it must print a number of seconds."""
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], cwd=BASE_DIR,
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        return {'error': (result.stderr.strip().splitlines() or ['failed'])[-1]}
+    return {'seconds': float(result.stdout.strip().splitlines()[-1])}
+
+
+def _unpickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_times(names, repeat):
+    results = {}
+    for name in names:
+        path = ModelRegistry().path(name)
+        warm = {}
+        _unpickle(path)
+        for source, load in [('pickle', lambda: _unpickle(path)),
+                             ('compiled', lambda: LinearModel.load(compiled_path(path)))]:
+            if source == 'compiled' and not os.path.exists(compiled_path(path)):
+                continue
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load()
+                samples.append(time.perf_counter() - start)
+            warm[source] = {'seconds': float(np.median(samples))}
+        # Cold loads include importing whatever the model needs
+        cold = {
+            'pickle': _subprocess_seconds(
+                f"import pickle, time; t = time.perf_counter(); pickle.load(open({path!r}, 'rb')); "
+                f"print(time.perf_counter() - t)"),
+            'compiled': _subprocess_seconds(
+                f"import time; t = time.perf_counter(); from compiled_model import LinearModel; "
+                f"LinearModel.load({compiled_path(path)!r}); print(time.perf_counter() - t)"),
+        }
+        results[name] = {'warm': warm, 'cold': cold}
+    return results
+
+
+def import_times(modules):
+    return {
+        module: _subprocess_seconds(
+            f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)")
+        for module in modules
+    }
+
+
+def peak_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def flatten(results, prefix=''):
+    """``{'a': {'b': 1}}`` -> ``{'a.b': 1}``, keeping only numbers."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def run(names=None, repeat=2000, batch_sizes=BATCH_SIZES, min_seconds=0.2, seed=0, modules=MODULES):
+    names = names or list(SCHEMAS)
+    results = {'latency': {}, 'throughput': {}}
+    for source, prefer_compiled in [('compiled', True), ('pickle', False)]:
+        registry = ModelRegistry(prefer_compiled=prefer_compiled)
+        for name in names:
+            model = registry.get(name)
+            if registry.entry(name).source != source:
+                continue
+            X = synthetic_inputs(SCHEMAS[name], max(batch_sizes), seed)
+            model.predict(X[:1])
+            results['latency'].setdefault(name, {})[source] = single_row_latency(model, X, repeat)
+            results['throughput'].setdefault(name, {})[source] = batch_throughput(model, X, batch_sizes, min_seconds)
+    results['load'] = load_times(names, max(1, repeat // 100))
+    results['import'] = import_times(modules)
+    results['peak_rss_bytes'] = peak_rss_bytes()
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+            'batch_sizes': list(batch_sizes),
+        },
+        'results': results,
+        'metrics': flatten(results),
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """Return ``(regressions, improvements)`` as lists of ``(metric, old, new, change)``."""
+    regressions, improvements = [], []
+    old_metrics, new_metrics = baseline['metrics'], current['metrics']
+    for metric in sorted(set(old_metrics) & set(new_metrics)):
+        old, new = old_metrics[metric], new_metrics[metric]
+        if old == 0:
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+        if worse > threshold:
+            regressions.append((metric, old, new, change))
+        elif worse < -threshold:
+            improvements.append((metric, old, new, change))
+    return regressions, improvements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the disease models.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and write JSON results")
+    run_parser.add_argument('-o', '--output', default='bench_results.json')
+    run_parser.add_argument('--models', nargs='+', choices=sorted(SCHEMAS))
+    run_parser.add_argument('--repeat', type=int, default=2000, help="single-row predictions per model")
+    run_parser.add_argument('--max-batch', type=int, default=max(BATCH_SIZES))
+    run_parser.add_argument('--min-seconds', type=float, default=0.2,
+                            help="time spent on each batch size")
+    run_parser.add_argument('--seed', type=int, default=0)
+
+    compare_parser = commands.add_parser('compare', help="flag regressions between two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="relative change that counts as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        sizes = [s for s in BATCH_SIZES if s <= args.max_batch] or [args.max_batch]
+        report = run(args.models, args.repeat, sizes, args.min_seconds, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        for metric, value in sorted(report['metrics'].items()):
+            print(f"{metric:60} {value:,.3f}")
+        print(f"Wrote {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions, improvements = compare(baseline, current, args.threshold)
+    for label, rows in [('Regressions', regressions), ('Improvements', improvements)]:
+        if rows:
+            print(f"{label} (more than {args.threshold:.0%}):")
+            for metric, old, new, change in rows:
+                print(f"  {metric:58} {old:,.3f} -> {new:,.3f} ({change:+.1%})")
+    if not regressions:
+        print("No regressions.")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""Score one patient record (or a whole file) with every model at once.
+
+    python combined.py panel.csv report.csv
+
+The combined panel is the union of all models' features, with measurements
+shared between models (``Feature.shared``, e.g. age) entered and parsed
+once. A shared field accepts anything one of its models does; each model
+still checks the value against its own bounds. A record is scored by every
+model whose features are all present and valid, with the models running
+concurrently on a thread pool, and the results come back as one
+consolidated report.
+
+Files may name a shared measurement either by its shared name (``age``) or
+by any model's own column name (``Age``). The same goes for a pasted or
+uploaded report (``read_report``), which the app uses to fill in every field
+of a page at once.
+"""
+import argparse
+import concurrent.futures
+import csv
+import dataclasses
+import io
+import json
+import sys
+import time
+
+import numpy as np
+
+from batch_score import (DEFAULT_CHUNK_SIZE, import_parquet, is_parquet, iter_csv_chunks,
+                         iter_parquet_chunks)
+from features import SCHEMAS
+from model_registry import registry
+from prediction_cache import cached_predict
+
+NOT_SCORED = -1
+
+
+def _build_panel():
+    fields, positions, aliases, users = {}, {}, {}, {}
+    for schema in SCHEMAS.values():
+        positions[schema.name] = []
+        for f in schema.features:
+            key = f.shared or f.name
+            aliases.setdefault(key, {key})
+            aliases[key].add(f.name)
+            users.setdefault(key, []).append(schema.name)
+            if key in fields:
+                # Accept what any model accepts; _score_model applies each model's own bounds
+                other = fields[key]
+                fields[key] = dataclasses.replace(
+                    other, label=other.term or other.label, normal=None,
+                    min_value=min(other.min_value, f.min_value), max_value=max(other.max_value, f.max_value),
+                    help=f"{other.term}, used by the {' and '.join(users[key])} assessments.")
+            else:
+                fields[key] = dataclasses.replace(f, name=key)
+            positions[schema.name].append(key)
+    order = list(fields)
+    index = {name: np.array([order.index(k) for k in keys]) for name, keys in positions.items()}
+    return tuple(fields.values()), index, aliases
+
+
+# Every input of the combined panel, and where each model's columns sit in it
+PANEL, PANEL_INDEX, _ALIASES = _build_panel()
+PANEL_COLUMNS = [f.name for f in PANEL]
+
+_executor = None
+
+
+def get_executor():
+    """Thread pool shared by everything that scores several models at once."""
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(SCHEMAS),
+                                                          thread_name_prefix='combined')
+    return _executor
+
+
+def _score_model(name, X, predict):
+    """Predictions for the rows of ``X`` that have every feature and are in range."""
+    schema = SCHEMAS[name]
+    X = X[:, PANEL_INDEX[name]]
+    missing = np.isnan(X).any(axis=1)
+    invalid = schema.invalid_rows(X) & ~missing
+    predictions = np.full(len(X), NOT_SCORED, dtype=np.int64)
+    ok = ~(missing | invalid)
+    if ok.any():
+        predictions[ok] = predict(name, np.ascontiguousarray(X[ok]))
+    return predictions, missing, invalid
+
+
+def _model_predict(name, X):
+    return registry.get(name).predict(X)
+
+
+def score_panel(X, predict=_model_predict, models=None):
+    """Score an ``(n, len(PANEL))`` array with every model in one pass.
+
+    Missing values are NaN. Returns ``{model: (predictions, missing, invalid)}``
+    where rows that were not scored have prediction ``NOT_SCORED``.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    models = [m for m in (models or SCHEMAS)
+              if not np.isnan(X[:, PANEL_INDEX[m]]).all()] if len(X) else []
+    futures = {m: get_executor().submit(_score_model, m, X, predict) for m in models}
+    results = {m: f.result() for m, f in futures.items()}
+    for m in SCHEMAS:
+        if m not in results:
+            results[m] = (np.full(len(X), NOT_SCORED, dtype=np.int64),
+                          np.ones(len(X), dtype=bool), np.zeros(len(X), dtype=bool))
+    return results
+
+
+def _lookup(record, key):
+    for alias in [key] + sorted(_ALIASES[key] - {key}):
+        value = record.get(alias)
+        if value is not None and value != '':
+            return value
+    return None
+
+
+def record_array(record):
+    """Parse a record (mapping of field name to value) into one panel row."""
+    row = np.full((1, len(PANEL)), np.nan)
+    for j, key in enumerate(PANEL_COLUMNS):
+        value = _lookup(record, key)
+        if value is not None:
+            try:
+                row[0, j] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a number, got {value!r}")
+    return row
+
+
+def read_report(data):
+    """Parse one record from a JSON object or a CSV header plus one row."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    text = data.strip()
+    if not text:
+        raise ValueError("The report is empty")
+    if text[0] in '{[':
+        try:
+            records = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"The report is not valid JSON: {e}")
+        if isinstance(records, dict):
+            records = [records]
+    else:
+        records = list(csv.DictReader(io.StringIO(text)))
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("A JSON report must be an object of field names to values")
+    if len(records) != 1:
+        raise ValueError(f"Expected one record, got {len(records)}")
+    return {str(k).strip(): v for k, v in records[0].items() if k is not None}
+
+
+def report_values(record, fields):
+    """Values from ``record`` for those of ``fields`` it provides.
+
+    Returns ``({field name: value}, problems)``, where values are converted
+    to each field's type and anything unparseable or out of range is left
+    out and described in ``problems``.
+    """
+    values, problems = {}, []
+    for f in fields:
+        raw = _lookup(record, f.shared or f.name)
+        if raw is None:
+            continue
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            problems.append(f"{f.label}: {raw!r} is not a number")
+            continue
+        if not f.min_value <= value <= f.max_value:
+            problems.append(f"{f.label}: {raw} is outside {f.min_value}–{f.max_value}")
+        elif f.dtype is int and not value.is_integer():
+            problems.append(f"{f.label}: {raw} is not a whole number")
+        else:
+            values[f.name] = f.dtype(value)
+    return values, problems
+
+
+def score_record(record):
+    """Consolidated report for one patient across every model."""
+    X = record_array(record)
+    report = {}
+    for name, (predictions, missing, invalid) in score_panel(X, cached_predict).items():
+        schema = SCHEMAS[name]
+        if missing[0]:
+            absent = [PANEL_COLUMNS[i] for i in PANEL_INDEX[name] if np.isnan(X[0, i])]
+            report[name] = {'status': 'missing', 'missing': absent}
+        elif invalid[0]:
+            report[name] = {'status': 'invalid'}
+        else:
+            prediction = int(predictions[0])
+            report[name] = {
+                'status': 'scored',
+                'prediction': prediction,
+                'result': schema.positive if prediction == 1 else schema.negative,
+            }
+    return report
+
+
+def _resolve_columns(names):
+    """Map each panel field to the file column providing it, if any."""
+    present = {}
+    for key in PANEL_COLUMNS:
+        for alias in [key] + sorted(_ALIASES[key] - {key}):
+            if alias in names:
+                present[key] = alias
+                break
+    return present
+
+
+def _file_columns(path):
+    if is_parquet(path):
+        return import_parquet().parquet.ParquetFile(path).schema_arrow.names
+    with open(path, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, id_column=None):
+    """Score a file with every model whose columns it contains.
+
+    Writes one CSV row per input row with a column per model (empty where the
+    model could not score the row). Returns ``(rows, seconds, models)``.
+    """
+    present = _resolve_columns(_file_columns(input_path))
+    models = [m for m in SCHEMAS if all(PANEL_COLUMNS[i] in present for i in PANEL_INDEX[m])]
+    if not models:
+        raise ValueError(f"{input_path} does not have all the columns of any model")
+    keys = [k for k in PANEL_COLUMNS if k in present]
+    positions = [PANEL_COLUMNS.index(k) for k in keys]
+
+    read = iter_parquet_chunks if is_parquet(input_path) else iter_csv_chunks
+    rows = 0
+    start = time.perf_counter()
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([id_column or 'row'] + models)
+        for ids, values in read(input_path, [present[k] for k in keys], chunk_size, id_column,
+                                allow_missing=True):
+            X = np.full((len(values), len(PANEL)), np.nan)
+            X[:, positions] = values
+            results = score_panel(X, models=models)
+            columns = [np.where(results[m][0] == NOT_SCORED, '', results[m][0].astype(str)) for m in models]
+            writer.writerows(zip(ids, *columns))
+            rows += len(X)
+    return rows, time.perf_counter() - start, models
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a file with every model in one pass.")
+    parser.add_argument('input', help="CSV or Parquet file with one patient per row")
+    parser.add_argument('output', help="CSV file to write the consolidated report to")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--id-column', help="input column copied to the output to identify each row")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    try:
+        rows, seconds, models = score_file(args.input, args.output, args.chunk_size, args.id_column)
+    except (OSError, RuntimeError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    rate = rows / seconds if seconds > 0 else float('inf')
+    print(f"Scored {rows} rows with {', '.join(models)} in {seconds:.2f}s ({rate:,.0f} rows/sec)",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
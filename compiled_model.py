@@ -0,0 +1,156 @@
+"""Pickle-free, NumPy-only form of the saved linear models.
+
+All three saved models are linear (``SVC(kernel='linear')`` for diabetes and
+Parkinson's, ``LogisticRegression`` for heart disease), so at inference time
+each one is a dot product with a weight vector plus an intercept. ``export``
+writes those numbers to a small ``.npz`` file next to the ``.sav`` file, and
+``LinearModel`` scores from it without importing scikit-learn or unpickling
+anything.
+
+    python compiled_model.py export       # write diabetes_model.npz etc.
+    python compiled_model.py check        # compare against the sklearn models
+
+Each file records the SHA-256 of the ``.sav`` it was compiled from, so a
+replaced model is never scored with stale coefficients.
+"""
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def compiled_path(sav_path):
+    return os.path.splitext(sav_path)[0] + '.npz'
+
+
+class LinearModel:
+    """Binary linear classifier with the ``predict`` API of the sklearn models."""
+
+    def __init__(self, coef, intercept, classes, feature_names=(), kind='', source_sha256=''):
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64).reshape(1, -1)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64).reshape(1)
+        self.classes_ = np.asarray(classes)
+        self.feature_names = [str(name) for name in feature_names]
+        self.kind = kind
+        self.source_sha256 = source_sha256
+        self._weights = self.coef_[0]
+        self._bias = float(self.intercept_[0])
+
+    @property
+    def n_features_in_(self):
+        return self.coef_.shape[1]
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, model expects {self.n_features_in_} features per row")
+        return X @ self._weights + self._bias
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+    @property
+    def predict_proba(self):
+        # Like sklearn, only offered by models whose margins are log-odds
+        if self.kind != 'LogisticRegression':
+            raise AttributeError(f"{self.kind or 'This model'} has no predict_proba")
+        return self._predict_proba
+
+    def _predict_proba(self, X):
+        positive = np.exp(-np.logaddexp(0.0, -self.decision_function(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    @classmethod
+    def from_estimator(cls, estimator, feature_names=(), source_sha256=''):
+        coef = getattr(estimator, 'coef_', None)
+        if coef is None or len(estimator.classes_) != 2 or np.shape(coef)[0] != 1:
+            raise ValueError(f"{type(estimator).__name__} is not a binary linear model")
+        coef = coef.toarray() if hasattr(coef, 'toarray') else coef
+        return cls(coef, estimator.intercept_, estimator.classes_, feature_names,
+                   type(estimator).__name__, source_sha256)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, format_version=np.array(FORMAT_VERSION), coef=self.coef_[0],
+                     intercept=self.intercept_, classes=self.classes_,
+                     feature_names=np.array(self.feature_names, dtype=np.str_),
+                     kind=np.array(self.kind), source_sha256=np.array(self.source_sha256))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+            return cls(data['coef'], data['intercept'], data['classes'], data['feature_names'].tolist(),
+                       str(data['kind']), str(data['source_sha256']))
+
+
+def export(names=None, registry=None):
+    """Compile the saved models to ``.npz`` files; returns the paths written."""
+    from features import SCHEMAS
+    from model_registry import registry as default_registry
+    from model_store import file_sha256
+
+    registry = registry or default_registry
+    written = []
+    for name in names or list(SCHEMAS):
+        path = registry.path(name)
+        with open(path, 'rb') as f:
+            estimator = pickle.load(f)
+        model = LinearModel.from_estimator(estimator, SCHEMAS[name].columns, file_sha256(path))
+        model.save(compiled_path(path))
+        written.append(compiled_path(path))
+    return written
+
+
+def check(names=None, rows=100000, seed=0, registry=None):
+    """Score random in-range rows with both forms of each model.
+
+    Returns ``{name: (mismatched predictions, max decision difference)}``.
+    """
+    from features import SCHEMAS
+    from model_registry import registry as default_registry
+
+    registry = registry or default_registry
+    rng = np.random.default_rng(seed)
+    results = {}
+    for name in names or list(SCHEMAS):
+        schema = SCHEMAS[name]
+        path = registry.path(name)
+        with open(path, 'rb') as f:
+            estimator = pickle.load(f)
+        model = LinearModel.load(compiled_path(path))
+        lows = np.array([f.min_value for f in schema.features], dtype=np.float64)
+        highs = np.array([f.max_value for f in schema.features], dtype=np.float64)
+        X = rng.uniform(lows, highs, size=(rows, len(schema)))
+        mismatches = int((model.predict(X) != estimator.predict(X)).sum())
+        diff = float(np.abs(model.decision_function(X) - estimator.decision_function(X)).max())
+        results[name] = (mismatches, diff)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the saved models to NumPy coefficient files.")
+    parser.add_argument('command', choices=['export', 'check'])
+    parser.add_argument('models', nargs='*', help="models to process (default: all)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        for path in export(args.models):
+            print(f"Wrote {path}")
+        return
+
+    failed = False
+    for name, (mismatches, diff) in check(args.models).items():
+        print(f"{name}: {mismatches} differing predictions, max decision difference {diff:.3g}")
+        failed |= mismatches > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
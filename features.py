@@ -0,0 +1,277 @@
+"""Declarative description of each disease model's inputs.
+
+One ``DiseaseSchema`` per saved model lists its features in the column order
+the model was trained on, with the widget bounds, help text and documented
+normal range of each. The Streamlit pages, the batch scorer and the HTTP API
+all build their inputs from these schemas, and whole batches are range
+checked at once with NumPy. Features that measure the same thing for
+different models (age) name it in ``shared`` so the combined panel asks for
+it once.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    label: str
+    dtype: type
+    min_value: float
+    max_value: float
+    normal: tuple = None
+    term: str = ''
+    description: str = ''
+    help: str = ''
+    # Name of the patient measurement this feature shares with other models
+    shared: str = None
+
+    def __post_init__(self):
+        # The bounds are also what batch files and the HTTP API are checked
+        # against, so they must at least admit the documented normal range
+        if self.normal is not None and not self.min_value <= self.normal[0] <= self.normal[1] <= self.max_value:
+            raise ValueError(f"{self.name}: normal range {self.normal} is outside "
+                             f"{self.min_value}–{self.max_value}")
+
+    @property
+    def default(self):
+        # Same starting value the number inputs have always used
+        return self.dtype(min(max(0, self.min_value), self.max_value))
+
+
+@dataclass(frozen=True)
+class DiseaseSchema:
+    name: str
+    page: str
+    icon: str
+    title: str
+    button: str
+    positive: str
+    negative: str
+    features: tuple
+    layout_columns: int = 3
+    _bounds: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        mins = np.array([f.min_value for f in self.features], dtype=np.float64)
+        maxs = np.array([f.max_value for f in self.features], dtype=np.float64)
+        ints = np.array([f.dtype is int for f in self.features])
+        object.__setattr__(self, '_bounds', (mins, maxs, ints))
+
+    @property
+    def columns(self):
+        return [f.name for f in self.features]
+
+    def __len__(self):
+        return len(self.features)
+
+    def to_array(self, records):
+        """Build a contiguous float64 ``(n, len(self))`` array.
+
+        ``records`` may be rows of values already in column order or mappings
+        keyed by feature name; a flat list of ``len(self)`` values is one row.
+        Anything else raises ``ValueError``.
+        """
+        records = list(records)
+        if records and isinstance(records[0], dict):
+            records = [[r[name] for name in self.columns] for r in records]
+        X = np.array(records, dtype=np.float64)
+        if X.ndim == 1 and len(X) in (0, len(self.features)):
+            X = X.reshape(-1, len(self.features))
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ValueError(f"{self.name} expects {len(self.features)} features per row, got shape {X.shape}")
+        return np.ascontiguousarray(X)
+
+    def _bad_values(self, X):
+        mins, maxs, ints = self._bounds
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.features):
+            raise ValueError(f"{self.name} expects {len(self.features)} features per row, got shape {X.shape}")
+        bad = ~np.isfinite(X) | (X < mins) | (X > maxs)
+        bad[:, ints] |= X[:, ints] != np.round(X[:, ints])
+        return bad
+
+    def invalid_rows(self, X):
+        """Boolean mask of rows with a missing, out-of-range or non-integer value."""
+        return self._bad_values(X).any(axis=1)
+
+    def validate(self, X, first_row=0):
+        """Raise ``ValueError`` describing the first invalid row of ``X``, if any."""
+        bad = self._bad_values(X)
+        rows = np.flatnonzero(bad.any(axis=1))
+        if not len(rows):
+            return
+        row = rows[0]
+        details = ', '.join(
+            f"{self.features[c].name}={float(X[row, c]):g} "
+            f"(allowed {self.features[c].min_value}–{self.features[c].max_value})"
+            for c in np.flatnonzero(bad[row]))
+        raise ValueError(f"{len(rows)} invalid {self.name} row(s) among rows {first_row}-{first_row + len(X) - 1}; "
+                         f"first is row {first_row + row}: {details}")
+
+
+SCHEMAS = {s.name: s for s in [
+    DiseaseSchema(
+        'diabetes', 'Diabetes Prediction', 'activity',
+        title='Diabetes Prediction Based on Test Reports',
+        button='Diabetes Test Result',
+        positive='We are sorry to say that, you are diabetic',
+        negative='Congratulations! you are not diabetic',
+        features=(
+            Feature('Pregnancies', 'Number of Pregnancies', int, 0, 20, normal=(0, 17),
+                    term='Number of Pregnancies', description='The number of times the person has been pregnant. (Normal range: 0–17)',
+                    help='Enter the number of pregnancies (0–17).'),
+            Feature('Glucose', 'Glucose Level (mg/dL)', int, 0, 200, normal=(70, 140),
+                    term='Glucose Level', description='The concentration of glucose in the blood, measured in mg/dL. (Normal range: 70–140 mg/dL)',
+                    help='Enter the glucose level in mg/dL (70–140 mg/dL is normal).'),
+            Feature('BloodPressure', 'Blood Pressure Value (mmHg)', int, 0, 150, normal=(90, 120),
+                    term='Blood Pressure Value', description='The systolic blood pressure, measured in mmHg. (Normal range: 90–120 mmHg)',
+                    help='Enter the systolic blood pressure in mmHg (90–120 mmHg is normal).'),
+            Feature('SkinThickness', 'Skin Thickness Value (mm)', int, 0, 100, normal=(10, 50),
+                    term='Skin Thickness Value', description='The thickness of the skin fold at the triceps, measured in mm. (Normal range: 10–50 mm)',
+                    help='Enter the skin thickness in mm (10–50 mm is normal).'),
+            Feature('Insulin', 'Insulin Level (µU/mL)', int, 0, 1000, normal=(16, 166),
+                    term='Insulin Level', description='The concentration of insulin in the blood, measured in µU/mL. (Normal range: 16–166 µU/mL)',
+                    help='Enter the insulin level in µU/mL (16–166 µU/mL is normal).'),
+            Feature('BMI', 'BMI Value', float, 0.0, 70.0, normal=(18.5, 24.9),
+                    term='BMI (Body Mass Index)', description='A measure of body fat based on height and weight. (Normal range: 18.5–24.9)',
+                    help='Enter the BMI value (18.5–24.9 is normal).'),
+            Feature('DiabetesPedigreeFunction', 'Diabetes Pedigree Function Value', float, 0.0, 3.0, normal=(0.08, 2.42),
+                    term='Diabetes Pedigree Function', description='A score that indicates the genetic influence of diabetes based on family history. (Normal range: 0.08–2.42)',
+                    help='Enter the diabetes pedigree function value (0.08–2.42 is normal).'),
+            Feature('Age', 'Age of the Person', int, 0, 120, normal=(21, 81),
+                    term='Age', description='The age of the person in years. (Normal range: 21–81 years)',
+                    help='Enter the age of the person (21–81 years is normal).',
+                    shared='age'),
+        ),
+    ),
+    DiseaseSchema(
+        'heart', 'Heart Risk Prediction', 'heart-pulse-fill',
+        title='Heart Risk Prediction Based on Test Reports',
+        button='Heart Disease Test Result',
+        positive='Your Heart is at Risk',
+        negative='Your Heart is not at risk',
+        features=(
+            Feature('age', 'Age', int, 0, 120, normal=(29, 77),
+                    term='Age', description='The age of the person in years. (Normal range: 29–77 years)',
+                    help='Enter the age of the person (29–77 years is normal).',
+                    shared='age'),
+            Feature('sex', 'Sex (0 = female, 1 = male)', int, 0, 1,
+                    term='Sex', description='The gender of the person (0 = female, 1 = male).',
+                    help='Enter 0 for female or 1 for male.'),
+            Feature('cp', 'Chest Pain Type (0–3)', int, 0, 3,
+                    term='Chest Pain Type', description='The type of chest pain experienced. (0 = typical angina, 1 = atypical angina, 2 = non-anginal pain, 3 = asymptomatic)',
+                    help='Enter the type of chest pain (0 = typical angina, 1 = atypical angina, 2 = non-anginal pain, 3 = asymptomatic).'),
+            Feature('trestbps', 'Resting Blood Pressure (mmHg)', int, 0, 200, normal=(90, 120),
+                    term='Resting Blood Pressure', description='The resting blood pressure in mmHg. (Normal range: 90–120 mmHg)',
+                    help='Enter the resting blood pressure in mmHg (90–120 mmHg is normal).'),
+            Feature('chol', 'Serum Cholesterol (mg/dL)', int, 0, 600, normal=(126, 200),
+                    term='Serum Cholesterol', description='The serum cholesterol level in mg/dL. (Normal range: 126–200 mg/dL)',
+                    help='Enter the serum cholesterol level in mg/dL (126–200 mg/dL is normal).'),
+            Feature('fbs', 'Fasting Blood Sugar > 120 mg/dL (1 = true, 0 = false)', int, 0, 1,
+                    term='Fasting Blood Sugar', description='Indicates if fasting blood sugar is > 120 mg/dL (1 = true, 0 = false).',
+                    help='Enter 1 if fasting blood sugar > 120 mg/dL, else 0.'),
+            Feature('restecg', 'Resting Electrocardiographic Results (0–2)', int, 0, 2,
+                    term='Resting Electrocardiographic Results', description='The results of the resting ECG. (0 = normal, 1 = ST-T wave abnormality, 2 = left ventricular hypertrophy)',
+                    help='Enter the resting ECG results (0 = normal, 1 = ST-T wave abnormality, 2 = left ventricular hypertrophy).'),
+            Feature('thalach', 'Maximum Heart Rate Achieved (bpm)', int, 0, 300, normal=(71, 202),
+                    term='Maximum Heart Rate Achieved', description='The maximum heart rate achieved during exercise. (Normal range: 71–202 bpm)',
+                    help='Enter the maximum heart rate achieved during exercise (71–202 bpm is normal).'),
+            Feature('exang', 'Exercise Induced Angina (1 = yes, 0 = no)', int, 0, 1,
+                    term='Exercise Induced Angina', description='Indicates if angina was induced by exercise (1 = yes, 0 = no).',
+                    help='Enter 1 if angina was induced by exercise, else 0.'),
+            Feature('oldpeak', 'ST Depression Induced by Exercise (mm)', float, 0.0, 10.0, normal=(0, 6.2),
+                    term='ST Depression Induced by Exercise', description='The ST depression induced by exercise relative to rest. (Normal range: 0–6.2 mm)',
+                    help='Enter the ST depression induced by exercise (0–6.2 mm is normal).'),
+            Feature('slope', 'Slope of the Peak Exercise ST Segment (0–2)', int, 0, 2,
+                    term='Slope of the Peak Exercise ST Segment', description='The slope of the peak exercise ST segment. (0 = upsloping, 1 = flat, 2 = downsloping)',
+                    help='Enter the slope of the peak exercise ST segment (0 = upsloping, 1 = flat, 2 = downsloping).'),
+            Feature('ca', 'Number of Major Vessels Colored by Fluoroscopy (0–3)', int, 0, 3,
+                    term='Number of Major Vessels Colored by Fluoroscopy', description='The number of major vessels colored by fluoroscopy (0–3).',
+                    help='Enter the number of major vessels colored by fluoroscopy (0–3).'),
+            Feature('thal', 'Thalassemia (0 = normal, 1 = fixed defect, 2 = reversible defect)', int, 0, 3,
+                    term='Thalassemia', description='A blood disorder called thalassemia. (0 = normal, 1 = fixed defect, 2 = reversible defect)',
+                    help='Enter the thalassemia value (0 = normal, 1 = fixed defect, 2 = reversible defect).'),
+        ),
+    ),
+    DiseaseSchema(
+        'parkinsons', 'Parkinsons Prediction', 'person-walking',
+        title="Parkinson's Prediction Based on Test Reports",
+        button="Parkinson's Test Result",
+        positive="Your patient has Parkinson's disease",
+        negative="Congratulations! your patient does not have Parkinson's disease",
+        layout_columns=5,
+        features=(
+            Feature('MDVP:Fo(Hz)', 'MDVP:Fo(Hz)', float, 0.0, 300.0, normal=(88, 260),
+                    term='MDVP:Fo(Hz)', description='Average vocal fundamental frequency. (Normal range: 88–260 Hz)',
+                    help='Enter the average vocal fundamental frequency (88–260 Hz is normal).'),
+            Feature('MDVP:Fhi(Hz)', 'MDVP:Fhi(Hz)', float, 0.0, 600.0, normal=(102, 592),
+                    term='MDVP:Fhi(Hz)', description='Maximum vocal fundamental frequency. (Normal range: 102–592 Hz)',
+                    help='Enter the maximum vocal fundamental frequency (102–592 Hz is normal).'),
+            Feature('MDVP:Flo(Hz)', 'MDVP:Flo(Hz)', float, 0.0, 300.0, normal=(65, 239),
+                    term='MDVP:Flo(Hz)', description='Minimum vocal fundamental frequency. (Normal range: 65–239 Hz)',
+                    help='Enter the minimum vocal fundamental frequency (65–239 Hz is normal).'),
+            Feature('MDVP:Jitter(%)', 'MDVP:Jitter(%)', float, 0.0, 1.0, normal=(0.001, 0.033),
+                    term='MDVP:Jitter(%)', description='Variation in fundamental frequency. (Normal range: 0.001–0.033%)',
+                    help='Enter the variation in fundamental frequency (0.001–0.033% is normal).'),
+            Feature('MDVP:Jitter(Abs)', 'MDVP:Jitter(Abs)', float, 0.0, 1.0, normal=(0.000007, 0.000260),
+                    term='MDVP:Jitter(Abs)', description='Absolute variation in fundamental frequency. (Normal range: 0.000007–0.000260)',
+                    help='Enter the absolute variation in fundamental frequency (0.000007–0.000260 is normal).'),
+            Feature('MDVP:RAP', 'MDVP:RAP', float, 0.0, 1.0, normal=(0.0006, 0.021),
+                    term='MDVP:RAP', description='Relative amplitude perturbation. (Normal range: 0.0006–0.021)',
+                    help='Enter the relative amplitude perturbation (0.0006–0.021 is normal).'),
+            Feature('MDVP:PPQ', 'MDVP:PPQ', float, 0.0, 1.0, normal=(0.0006, 0.019),
+                    term='MDVP:PPQ', description='Five-point period perturbation quotient. (Normal range: 0.0006–0.019)',
+                    help='Enter the five-point period perturbation quotient (0.0006–0.019 is normal).'),
+            Feature('Jitter:DDP', 'Jitter:DDP', float, 0.0, 1.0, normal=(0.0018, 0.063),
+                    term='Jitter:DDP', description='Average absolute difference of differences between cycles. (Normal range: 0.0018–0.063)',
+                    help='Enter the average absolute difference of differences between cycles (0.0018–0.063 is normal).'),
+            Feature('MDVP:Shimmer', 'MDVP:Shimmer', float, 0.0, 1.0, normal=(0.009, 0.119),
+                    term='MDVP:Shimmer', description='Variation in amplitude. (Normal range: 0.009–0.119)',
+                    help='Enter the variation in amplitude (0.009–0.119 is normal).'),
+            Feature('MDVP:Shimmer(dB)', 'MDVP:Shimmer(dB)', float, 0.0, 2.0, normal=(0.085, 1.302),
+                    term='MDVP:Shimmer(dB)', description='Shimmer in decibels. (Normal range: 0.085–1.302 dB)',
+                    help='Enter the shimmer in decibels (0.085–1.302 dB is normal).'),
+            Feature('Shimmer:APQ3', 'Shimmer:APQ3', float, 0.0, 1.0, normal=(0.004, 0.031),
+                    term='Shimmer:APQ3', description='Three-point amplitude perturbation quotient. (Normal range: 0.004–0.031)',
+                    help='Enter the three-point amplitude perturbation quotient (0.004–0.031 is normal).'),
+            Feature('Shimmer:APQ5', 'Shimmer:APQ5', float, 0.0, 1.0, normal=(0.005, 0.042),
+                    term='Shimmer:APQ5', description='Five-point amplitude perturbation quotient. (Normal range: 0.005–0.042)',
+                    help='Enter the five-point amplitude perturbation quotient (0.005–0.042 is normal).'),
+            Feature('MDVP:APQ', 'MDVP:APQ', float, 0.0, 1.0, normal=(0.007, 0.054),
+                    term='MDVP:APQ', description='Amplitude perturbation quotient. (Normal range: 0.007–0.054)',
+                    help='Enter the amplitude perturbation quotient (0.007–0.054 is normal).'),
+            Feature('Shimmer:DDA', 'Shimmer:DDA', float, 0.0, 1.0, normal=(0.013, 0.169),
+                    term='Shimmer:DDA', description='Average absolute difference between consecutive differences of amplitudes. (Normal range: 0.013–0.169)',
+                    help='Enter the average absolute difference between consecutive differences of amplitudes (0.013–0.169 is normal).'),
+            Feature('NHR', 'NHR', float, 0.0, 1.0, normal=(0.0006, 0.314),
+                    term='NHR', description='Noise-to-harmonics ratio. (Normal range: 0.0006–0.314)',
+                    help='Enter the noise-to-harmonics ratio (0.0006–0.314 is normal).'),
+            Feature('HNR', 'HNR', float, 0.0, 50.0, normal=(8.441, 33.047),
+                    term='HNR', description='Harmonics-to-noise ratio. (Normal range: 8.441–33.047)',
+                    help='Enter the harmonics-to-noise ratio (8.441–33.047 is normal).'),
+            Feature('RPDE', 'RPDE', float, 0.0, 1.0, normal=(0.256, 0.685),
+                    term='RPDE', description='Recurrence period density entropy. (Normal range: 0.256–0.685)',
+                    help='Enter the recurrence period density entropy (0.256–0.685 is normal).'),
+            Feature('DFA', 'DFA', float, 0.0, 1.0, normal=(0.574, 0.825),
+                    term='DFA', description='Detrended fluctuation analysis. (Normal range: 0.574–0.825)',
+                    help='Enter the detrended fluctuation analysis (0.574–0.825 is normal).'),
+            Feature('spread1', 'spread1', float, -10.0, 0.0, normal=(-7.964, -2.434),
+                    term='spread1', description='Nonlinear measure of fundamental frequency variation. (Normal range: -7.964–-2.434)',
+                    help='Enter the nonlinear measure of fundamental frequency variation (-7.964–-2.434 is normal).'),
+            Feature('spread2', 'spread2', float, 0.0, 1.0, normal=(0.006, 0.450),
+                    term='spread2', description='Nonlinear measure of fundamental frequency variation. (Normal range: 0.006–0.450)',
+                    help='Enter the nonlinear measure of fundamental frequency variation (0.006–0.450 is normal).'),
+            Feature('D2', 'D2', float, 0.0, 5.0, normal=(1.423, 3.671),
+                    term='D2', description='Correlation dimension. (Normal range: 1.423–3.671)',
+                    help='Enter the correlation dimension (1.423–3.671 is normal).'),
+            Feature('PPE', 'PPE', float, 0.0, 1.0, normal=(0.044, 0.527),
+                    term='PPE', description='Pitch period entropy. (Normal range: 0.044–0.527)',
+                    help='Enter the pitch period entropy (0.044–0.527 is normal).'),
+        ),
+    ),
+]}
+
+# Column order each saved model was trained on
+FEATURE_COLUMNS = {name: schema.columns for name, schema in SCHEMAS.items()}
@@ -0,0 +1,355 @@
+"""JSON prediction service for other systems, without a Streamlit session.
+
+    python inference_server.py --port 8000 --max-batch 256 --max-wait-ms 2
+
+Endpoints:
+
+    POST /predict/<disease>   {"features": [...]} or {"features": {"name": value, ...}}
+                              or {"rows": [[...], ...]} for several rows at once
+    GET  /stats               latency percentiles, throughput and batch sizes
+    GET  /health
+
+Requests for the same model that arrive within ``max_wait`` of each other
+(or until ``max_batch`` rows are queued) are stacked into one array and
+scored with a single ``predict`` call; each caller gets its own rows back.
+A larger window raises throughput under load at the cost of p50 latency
+when traffic is light, so tune the two settings against ``/stats``. Rows
+already answered for the current model version come from the shared
+prediction cache and never reach a batch.
+
+``LocalClient`` talks to the service in-process, which is handy for tests.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+import numpy as np
+
+from features import SCHEMAS
+from model_registry import registry
+from prediction_cache import cache as prediction_cache, row_keys
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT = 0.002
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Collects concurrent requests for one model into a single predict call."""
+
+    def __init__(self, name, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, window=10000):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.latencies = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.started = time.monotonic()
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def predict(self, X):
+        """Queue the rows of ``X`` and wait for ``(predictions, version)``.
+
+        ``version`` is the model version that scored the batch, which can be
+        newer than the one current when the rows were queued.
+        """
+        self.start()
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, future))
+        try:
+            return await future
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+            self.requests += 1
+            self.rows += len(X)
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        items = [await self._queue.get()]
+        rows = len(items[0][0])
+        deadline = loop.time() + self.max_wait
+        while rows < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._next_batch()
+            X = np.concatenate([x for x, _ in items]) if len(items) > 1 else items[0][0]
+            self.batch_sizes.append(len(X))
+            try:
+                # One entry for the whole batch so every row is scored by the same version
+                entry = registry.entry(self.name)
+                predictions = await loop.run_in_executor(None, entry.model.predict, X)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            offset = 0
+            for x, future in items:
+                if not future.done():
+                    future.set_result((predictions[offset:offset + len(x)], entry.version))
+                offset += len(x)
+
+    def stats(self):
+        latencies = np.fromiter(self.latencies, dtype=np.float64)
+        batches = np.fromiter(self.batch_sizes, dtype=np.float64)
+        elapsed = time.monotonic() - self.started
+        stats = {
+            'requests': self.requests,
+            'rows': self.rows,
+            'rows_per_sec': self.rows / elapsed if elapsed > 0 else 0.0,
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'mean_batch_rows': float(batches.mean()) if len(batches) else 0.0,
+        }
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+            stats.update(p50_ms=p50, p90_ms=p90, p99_ms=p99)
+        return stats
+
+
+class InferenceService:
+    """Routes JSON requests to one ``MicroBatcher`` per disease model."""
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, cache=prediction_cache):
+        self.batchers = {name: MicroBatcher(name, max_batch, max_wait) for name in SCHEMAS}
+        self.cache = cache
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    async def handle(self, method, path, payload=None):
+        """Return ``(status, response)`` for one request."""
+        try:
+            return 200, await self._route(method, path.split('?', 1)[0].rstrip('/'), payload)
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': f"Error in prediction: {e}"}
+
+    async def _route(self, method, path, payload):
+        if path == '/health' and method == 'GET':
+            return {'status': 'ok', 'models': sorted(self.batchers)}
+        if path == '/stats' and method == 'GET':
+            return {
+                'models': {name: b.stats() for name, b in self.batchers.items()},
+                'loaded': registry.stats(),
+                'cache': self.cache.stats() if self.cache is not None else None,
+            }
+        if path.startswith('/predict/'):
+            if method != 'POST':
+                raise HTTPError(405, "Use POST to request predictions")
+            return await self.predict(path[len('/predict/'):], payload)
+        raise HTTPError(404, f"No such endpoint: {method} {path}")
+
+    async def predict(self, name, payload):
+        if name not in SCHEMAS:
+            raise HTTPError(404, f"Unknown model: {name}")
+        schema = SCHEMAS[name]
+        X, single = _payload_array(schema, payload)
+        try:
+            schema.validate(X)
+        except ValueError as e:
+            raise HTTPError(422, str(e))
+        predictions, version = await self._predict(name, X)
+        predictions = predictions.tolist()
+        response = {'model': name, 'version': version}
+        if single:
+            response['prediction'] = predictions[0]
+        else:
+            response['predictions'] = predictions
+        return response
+
+    async def _predict(self, name, X):
+        """``(predictions, version)`` for ``X``, all from one model version."""
+        if self.cache is None:
+            return await self.batchers[name].predict(X)
+        keys = row_keys(X, self.cache.decimals)
+        version = registry.entry(name).version
+        found = self.cache.lookup(name, version, keys)
+        missing = [i for i in range(len(keys)) if i not in found]
+        if not missing:
+            return np.array([found[i] for i in range(len(keys))], dtype=np.int64), version
+        predictions, scored = await self.batchers[name].predict(X[missing])
+        if scored != version and found:
+            # The model was swapped while the rows were queued; the cached
+            # answers belong to the old version, so score everything again
+            found = {}
+            missing = list(range(len(keys)))
+            predictions, scored = await self.batchers[name].predict(X)
+        self.cache.store(name, scored, zip((keys[i] for i in missing), predictions))
+        result = np.empty(len(keys), dtype=np.int64)
+        result[missing] = predictions
+        for i, value in found.items():
+            result[i] = value
+        return result, scored
+
+
+def _payload_array(schema, payload):
+    if not isinstance(payload, dict) or ('features' in payload) == ('rows' in payload):
+        raise HTTPError(400, 'Send a JSON object with either "features" or "rows"')
+    single = 'features' in payload
+    records = [payload['features']] if single else payload['rows']
+    if not isinstance(records, list) or not records:
+        raise HTTPError(400, '"rows" must be a non-empty list')
+    try:
+        for record in records:
+            if isinstance(record, dict):
+                missing = [c for c in schema.columns if c not in record]
+                if missing:
+                    raise HTTPError(400, f"Missing features: {', '.join(missing)}")
+            elif not isinstance(record, list) or len(record) != len(schema):
+                raise HTTPError(400, f"{schema.name} expects {len(schema)} features per row")
+        return schema.to_array(records), single
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, f"Features must be numbers: {e}")
+
+
+class LocalClient:
+    """Calls an ``InferenceService`` in-process, going through the JSON codec."""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def request(self, method, path, payload=None):
+        body = json.loads(json.dumps(payload)) if payload is not None else None
+        status, response = await self.service.handle(method, path, body)
+        return status, json.loads(json.dumps(response))
+
+    async def get(self, path):
+        return await self.request('GET', path)
+
+    async def post(self, path, payload):
+        return await self.request('POST', path, payload)
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+
+async def _serve_connection(service, reader, writer, max_body):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # Without a usable length the body cannot be skipped, so close afterwards
+                status, response = 400, {'error': "Content-Length must be a non-negative integer"}
+                keep_alive = False
+            elif length > max_body:
+                status, response = 413, {'error': "Request body too large"}
+                keep_alive = False
+            else:
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    payload = json.loads(body) if body else None
+                except ValueError:
+                    status, response = 400, {'error': "Request body is not valid JSON"}
+                else:
+                    status, response = await service.handle(method, target, payload)
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+
+            data = json.dumps(response).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=8000, max_batch=DEFAULT_MAX_BATCH,
+                max_wait=DEFAULT_MAX_WAIT, max_body=1 << 24, cache=prediction_cache):
+    service = InferenceService(max_batch, max_wait, cache)
+    # Load every model up front so the first requests do not pay for it
+    for name in SCHEMAS:
+        registry.get(name)
+    server = await asyncio.start_server(
+        lambda r, w: _serve_connection(service, r, w, max_body), host, port)
+    print(f"Serving predictions on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the disease models over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help=f"most rows scored per predict call (default {DEFAULT_MAX_BATCH})")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT * 1000,
+                        help=f"how long to wait for more requests (default {DEFAULT_MAX_WAIT * 1000:g})")
+    parser.add_argument('--no-cache', action='store_true', help="always run the model, even for repeated rows")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms / 1000,
+                          cache=None if args.no_cache else prediction_cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
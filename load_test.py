@@ -0,0 +1,401 @@
+"""Load-test one instance of the app with many simulated users.
+
+    python load_test.py --rates 0.5 1 2 4 --duration 60 --json load.json
+    python load_test.py --url ws://10.0.0.5:8501 --pid 4242 --rates 2
+
+Starts ``streamlit run mdps_public.py`` headless on a free port (or uses the
+server at ``--url``) and drives it over the same websocket protocol as a
+browser, so nothing in the app is patched or mocked. For each of
+``--rates`` in turn, users arrive at random (a Poisson process, that many
+users per second) for ``--duration`` seconds. Each user opens the app,
+switches to a random disease page with the menu, fills in every field with
+values inside their normal ranges and submits the form, ``--predictions``
+times, pausing about ``--think`` seconds between steps.
+
+Every rerun is timed from sending the browser's request to the server
+reporting the script finished. Per rate, the report gives rerun latency
+percentiles by action, error rates (exceptions, error messages, timeouts,
+dropped connections) and the server process's CPU and memory, sampled every
+``--sample-interval`` seconds into a timeline. The server's CPU and memory
+come from psutil when it is installed, otherwise from ``/proc``.
+
+The users run as coroutines in this process; on a small machine run the
+tool on another host (``--url`` and, for resource sampling, a local
+``--pid``) so it does not compete with the server for CPU.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from benchmark import synthetic_inputs
+from features import SCHEMAS
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mdps_public.py')
+ACTIONS = ('open', 'page', 'predict')
+
+# Alert.Format values in Streamlit's protocol
+_ALERT_ERROR, _ALERT_SUCCESS = 1, 4
+
+
+def _import_streamlit_protocol():
+    try:
+        import websockets
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+    except ImportError:
+        raise RuntimeError("Load testing requires the websockets package (pip install websockets)")
+    return websockets, BackMsg, ForwardMsg, WidgetState
+
+
+class RerunError(Exception):
+    def __init__(self, kind, message=''):
+        super().__init__(message or kind)
+        self.kind = kind
+
+
+class _Session:
+    """One simulated browser tab: a websocket and the widget values it has set."""
+
+    def __init__(self, ws, timeout):
+        self.ws = ws
+        self.timeout = timeout
+        self.menu_id = None
+        self.inputs = {}
+        self.buttons = {}
+        self.states = {}
+
+    async def rerun(self, triggers=()):
+        """Send the current widget values and wait for the script to finish.
+
+        Returns ``(seconds, alerts)`` where alerts are ``(format, body)``.
+        """
+        _, BackMsg, ForwardMsg, WidgetState = _import_streamlit_protocol()
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        msg.rerun_script.widget_states.widgets.extend(WidgetState(id=i, trigger_value=True) for i in triggers)
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        alerts = []
+        self.inputs, self.buttons = {}, {}
+        while True:
+            try:
+                raw = await asyncio.wait_for(self.ws.recv(), self.timeout)
+            except asyncio.TimeoutError:
+                raise RerunError('timeout', f"no response within {self.timeout}s")
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                self._see(forward.delta.new_element, alerts)
+            elif kind == 'script_finished':
+                if forward.script_finished != forward.FINISHED_SUCCESSFULLY:
+                    raise RerunError('script_error', forward.ScriptFinishedStatus.Name(forward.script_finished))
+                return time.perf_counter() - start, alerts
+
+    def _see(self, element, alerts):
+        kind = element.WhichOneof('type')
+        if kind == 'exception':
+            raise RerunError('exception', element.exception.message)
+        if kind == 'alert':
+            alerts.append((element.alert.format, element.alert.body))
+        elif kind == 'component_instance' and 'option_menu' in element.component_instance.component_name:
+            self.menu_id = element.component_instance.id
+        elif kind == 'number_input':
+            # Widget ids end with the widget's key, e.g. "...-heart_age"
+            widget = element.number_input
+            self.inputs[widget.id.rsplit('-', 1)[-1]] = (widget.id, widget.data_type)
+        elif kind == 'button':
+            self.buttons[element.button.label] = element.button.id
+
+    def select_page(self, page):
+        _, _, _, WidgetState = _import_streamlit_protocol()
+        if self.menu_id is None:
+            raise RerunError('no_menu', "the page menu was not rendered")
+        # Fields of the previous page are gone once the page changes
+        self.states = {self.menu_id: WidgetState(id=self.menu_id, json_value=json.dumps(page))}
+
+    def fill(self, values):
+        _, _, _, WidgetState = _import_streamlit_protocol()
+        for key, value in values.items():
+            if key not in self.inputs:
+                raise RerunError('missing_field', f"no input with key {key}")
+            widget_id, data_type = self.inputs[key]
+            if data_type == 0:
+                self.states[widget_id] = WidgetState(id=widget_id, int_value=int(value))
+            else:
+                self.states[widget_id] = WidgetState(id=widget_id, double_value=float(value))
+
+
+class Recorder:
+    """Every rerun of one load step: ``(time, action, page, seconds, error kind or None)``."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.reruns = []
+        self.active = 0
+        self.users = 0
+
+    def add(self, action, page, seconds, error=None):
+        self.reruns.append((time.perf_counter() - self.start, action, page, seconds, error))
+
+
+async def _timed(recorder, session, action, page, triggers=(), expect_result=False):
+    start = time.perf_counter()
+    try:
+        seconds, alerts = await session.rerun(triggers)
+    except RerunError as e:
+        recorder.add(action, page, time.perf_counter() - start, e.kind)
+        return False
+    error = None
+    if any(fmt == _ALERT_ERROR for fmt, _ in alerts):
+        error = 'app_error'
+    elif expect_result and not any(fmt == _ALERT_SUCCESS for fmt, _ in alerts):
+        error = 'no_result'
+    recorder.add(action, page, seconds, error)
+    return error is None
+
+
+async def simulate_user(url, recorder, rng, think, predictions, timeout):
+    """One user: open the app, pick a disease page and submit it ``predictions`` times."""
+    websockets, _, _, _ = _import_streamlit_protocol()
+    recorder.users += 1
+    recorder.active += 1
+    schema = SCHEMAS[rng.choice(sorted(SCHEMAS))]
+    try:
+        async with websockets.connect(f"{url}/_stcore/stream", max_size=None) as ws:
+            session = _Session(ws, timeout)
+            if not await _timed(recorder, session, 'open', 'Home'):
+                return
+            await asyncio.sleep(rng.exponential(think))
+            session.select_page(schema.page)
+            if not await _timed(recorder, session, 'page', schema.page):
+                return
+            for i in range(predictions):
+                # Typing into a form sends nothing; only the submission reruns
+                await asyncio.sleep(rng.exponential(think))
+                row = synthetic_inputs(schema, 1, seed=int(rng.integers(1 << 31)))[0]
+                session.fill({f"{schema.name}_{f.name}": v for f, v in zip(schema.features, row)})
+                submit = session.buttons.get(schema.button)
+                if submit is None:
+                    recorder.add('predict', schema.page, 0.0, 'missing_button')
+                    return
+                await _timed(recorder, session, 'predict', schema.page, [submit], expect_result=True)
+    except (OSError, RerunError) as e:
+        recorder.add('session', schema.page, 0.0, getattr(e, 'kind', 'disconnected'))
+    except websockets.exceptions.WebSocketException:
+        recorder.add('session', schema.page, 0.0, 'disconnected')
+    finally:
+        recorder.active -= 1
+
+
+class ResourceSampler:
+    """CPU percent and resident memory of a process, psutil or ``/proc``."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        try:
+            import psutil
+            self._process = psutil.Process(pid) if pid else None
+        except ImportError:
+            self._process = None
+        self._last = None
+
+    def _read(self):
+        if self._process is not None:
+            cpu = self._process.cpu_times()
+            return cpu.user + cpu.system, self._process.memory_info().rss
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            with open(f"/proc/{self.pid}/statm") as f:
+                pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+        ticks = os.sysconf('SC_CLK_TCK')
+        return (int(fields[11]) + int(fields[12])) / ticks, pages * os.sysconf('SC_PAGE_SIZE')
+
+    def sample(self):
+        """``(cpu_percent, rss_bytes)`` since the previous call; None where unknown."""
+        if not self.pid:
+            return None, None
+        now, reading = time.perf_counter(), self._read()
+        if reading is None:
+            return None, None
+        cpu_seconds, rss = reading
+        cpu_percent = None
+        if self._last is not None:
+            cpu_percent = (cpu_seconds - self._last[1]) / (now - self._last[0]) * 100
+        self._last = (now, cpu_seconds)
+        return cpu_percent, rss
+
+
+def _latency(seconds):
+    if not len(seconds):
+        return {}
+    p50, p90, p99 = np.percentile(seconds, [50, 90, 99])
+    return {'p50_ms': p50 * 1e3, 'p90_ms': p90 * 1e3, 'p99_ms': p99 * 1e3, 'max_ms': float(np.max(seconds)) * 1e3}
+
+
+def summarize(reruns):
+    """Counts, error rates and latency percentiles overall and per action."""
+    groups = {'all': reruns}
+    for action in ACTIONS + ('session',):
+        rows = [r for r in reruns if r[1] == action]
+        if rows:
+            groups[action] = rows
+    summary = {}
+    for name, rows in groups.items():
+        errors = {}
+        for r in rows:
+            if r[4] is not None:
+                errors[r[4]] = errors.get(r[4], 0) + 1
+        ok = np.array([r[3] for r in rows if r[4] is None])
+        summary[name] = {'reruns': len(rows), 'errors': errors,
+                         'error_rate': sum(errors.values()) / len(rows), **_latency(ok)}
+    return summary
+
+
+async def run_step(url, rate, duration, sampler, think=1.0, predictions=3, timeout=30.0,
+                   sample_interval=1.0, seed=0):
+    """Users arrive at ``rate`` per second for ``duration`` seconds; waits for all of them."""
+    rng = np.random.default_rng(seed)
+    recorder = Recorder()
+    timeline = []
+    sampler.sample()
+
+    async def sample():
+        seen = 0
+        while True:
+            await asyncio.sleep(sample_interval)
+            cpu, rss = sampler.sample()
+            recent = recorder.reruns[seen:]
+            seen += len(recent)
+            timeline.append({'t': time.perf_counter() - recorder.start, 'active_users': recorder.active,
+                             'reruns': len(recent), 'errors': sum(r[4] is not None for r in recent),
+                             'cpu_percent': cpu, 'rss_bytes': rss,
+                             **_latency(np.array([r[3] for r in recent if r[4] is None]))})
+
+    sampling = asyncio.ensure_future(sample())
+    users = []
+    deadline = recorder.start + duration
+    while True:
+        await asyncio.sleep(rng.exponential(1.0 / rate))
+        if time.perf_counter() >= deadline:
+            break
+        users.append(asyncio.ensure_future(simulate_user(
+            url, recorder, np.random.default_rng(rng.integers(1 << 31)), think, predictions, timeout)))
+    await asyncio.gather(*users)
+    sampling.cancel()
+    cpu = [s['cpu_percent'] for s in timeline if s['cpu_percent'] is not None]
+    rss = [s['rss_bytes'] for s in timeline if s['rss_bytes'] is not None]
+    return {
+        'rate': rate,
+        'users': recorder.users,
+        'seconds': time.perf_counter() - recorder.start,
+        'peak_active_users': max([s['active_users'] for s in timeline], default=recorder.active),
+        'summary': summarize(recorder.reruns),
+        'cpu_percent': {'mean': float(np.mean(cpu)), 'max': float(np.max(cpu))} if cpu else None,
+        'peak_rss_bytes': max(rss) if rss else None,
+        'timeline': timeline,
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port=None, timeout=60.0):
+    """Start the app headless; returns ``(process, websocket base URL)``."""
+    port = port or _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Streamlit exited: {process.stderr.read().decode(errors='replace')[-500:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process, f"ws://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Streamlit did not start within {timeout:.0f}s")
+
+
+def _ms(step, key, action='all'):
+    value = step['summary'].get(action, {}).get(key)
+    return f"{value:,.0f}" if value is not None else '-'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the app with simulated users.")
+    parser.add_argument('--url', help="websocket URL of a running app, e.g. ws://127.0.0.1:8501 "
+                                      "(default: start one)")
+    parser.add_argument('--pid', type=int, help="server process to sample CPU and memory of with --url")
+    parser.add_argument('--rates', type=float, nargs='+', default=[1.0],
+                        help="new users per second, one load step per rate (default 1)")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds of arrivals per step")
+    parser.add_argument('--think', type=float, default=1.0, help="mean pause between a user's steps")
+    parser.add_argument('--predictions', type=int, default=3, help="form submissions per user")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds before a rerun counts as failed")
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write every step, with its timeline, to this file")
+    args = parser.parse_args(argv)
+    if any(rate <= 0 for rate in args.rates):
+        parser.error("--rates must be positive")
+
+    process = None
+    try:
+        _import_streamlit_protocol()
+        if args.url:
+            url, pid = args.url.rstrip('/'), args.pid
+        else:
+            process, url = start_server()
+            pid = process.pid
+    except RuntimeError as e:
+        parser.exit(1, f"error: {e}\n")
+
+    sampler = ResourceSampler(pid)
+    steps = []
+    try:
+        print(f"{'users/s':>8} {'users':>6} {'reruns':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+              f"{'pred p90':>9} {'errors':>7} {'cpu %':>6} {'rss MB':>7}")
+        for i, rate in enumerate(args.rates):
+            step = asyncio.run(run_step(url, rate, args.duration, sampler, args.think, args.predictions,
+                                        args.timeout, args.sample_interval, args.seed + i))
+            steps.append(step)
+            total = step['summary'].get('all', {'reruns': 0, 'error_rate': 0.0})
+            cpu = f"{step['cpu_percent']['mean']:.0f}" if step['cpu_percent'] else '-'
+            rss = f"{step['peak_rss_bytes'] / 2**20:.0f}" if step['peak_rss_bytes'] else '-'
+            print(f"{rate:>8g} {step['users']:>6} {total['reruns']:>7} {_ms(step, 'p50_ms'):>8} "
+                  f"{_ms(step, 'p90_ms'):>8} {_ms(step, 'p99_ms'):>8} {_ms(step, 'p90_ms', 'predict'):>9} "
+                  f"{total['error_rate']:>7.1%} {cpu:>6} {rss:>7}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'app': APP if not args.url else args.url, 'think': args.think,
+                       'predictions': args.predictions, 'duration': args.duration, 'steps': steps},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
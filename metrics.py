@@ -0,0 +1,228 @@
+"""Prometheus-style counters and histograms for the hot paths of the app.
+
+Disabled unless ``MDPS_METRICS=1``; ``timer`` then hands back a shared no-op
+context manager, so instrumented code pays about one attribute lookup and a
+function call. When enabled the metrics can be scraped from a local HTTP
+endpoint (``MDPS_METRICS_PORT``, e.g. 9464) and/or written periodically to a
+file in the text exposition format (``MDPS_METRICS_FILE``, every
+``MDPS_METRICS_INTERVAL`` seconds, default 15), e.g. for the node exporter's
+textfile collector.
+"""
+import bisect
+import http.server
+import os
+import sys
+import threading
+import time
+
+# Seconds; covers a cheap predict up to a slow first model load
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled = os.environ.get('MDPS_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_help = {
+    'mdps_reruns_total': ('counter', "Streamlit script reruns by page."),
+    'mdps_predictions_total': ('counter', "Prediction requests by page and model."),
+    'mdps_stage_seconds': ('histogram', "Time spent in each stage of a rerun."),
+}
+_exporters_started = False
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+def inc(name, amount=1, **labels):
+    """Add ``amount`` to counter ``name``."""
+    if not enabled:
+        return
+    with _lock:
+        series = _counters.setdefault(name, {})
+        key = _key(labels)
+        series[key] = series.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """Record ``value`` (seconds) in histogram ``name``."""
+    if not enabled:
+        return
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        key = _key(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = _Histogram(DEFAULT_BUCKETS)
+        hist.counts[bisect.bisect_left(DEFAULT_BUCKETS, value)] += 1
+        hist.sum += value
+        hist.count += 1
+
+
+class _Timer:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage, page='', model=''):
+    """Time a ``with`` block as one observation of ``mdps_stage_seconds``."""
+    if not enabled:
+        return _NULL_TIMER
+    return _Timer('mdps_stage_seconds', {'stage': stage, 'page': page, 'model': model})
+
+
+def observe_stage(stage, seconds, page='', model=''):
+    """Record a stage timed by the caller, e.g. one spanning a whole rerun."""
+    observe('mdps_stage_seconds', seconds, stage=stage, page=page, model=model)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for name in sorted(set(_counters) | set(_histograms)):
+            kind, text = _help.get(name, ('counter' if name in _counters else 'histogram', ''))
+            if text:
+                lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(_counters.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(key)} {value}")
+            for key, hist in sorted(_histograms.get(name, {}).items()):
+                cumulative = 0
+                for bound, count in zip(DEFAULT_BUCKETS, hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {hist.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {hist.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class _ScrapeHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host='127.0.0.1'):
+    """Serve ``/metrics`` from a background thread."""
+    server = http.server.ThreadingHTTPServer((host, port), _ScrapeHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def write_file(path):
+    # Write then rename so a scraper never reads a half-written file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def flush_periodically(path, interval):
+    def loop():
+        last_error = None
+        while True:
+            time.sleep(interval)
+            try:
+                write_file(path)
+            except OSError as e:
+                # Keep trying (the disk may free up), but say so only once per problem
+                if str(e) != last_error:
+                    print(f"Could not write metrics to {path}: {e}", file=sys.stderr)
+                last_error = str(e)
+            else:
+                last_error = None
+
+    threading.Thread(target=loop, name='metrics-flush', daemon=True).start()
+
+
+def start_exporters():
+    """Start whichever exporters the environment asks for, once per process."""
+    global _exporters_started
+    if not enabled or _exporters_started:
+        return
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    port = os.environ.get('MDPS_METRICS_PORT')
+    if port:
+        host = os.environ.get('MDPS_METRICS_HOST', '127.0.0.1')
+        try:
+            serve(int(port), host)
+        except (OSError, ValueError) as e:
+            # A busy port (e.g. a second app process) must not take the app down
+            print(f"Not serving metrics on {host}:{port}: {e}", file=sys.stderr)
+    path = os.environ.get('MDPS_METRICS_FILE')
+    if path:
+        interval = os.environ.get('MDPS_METRICS_INTERVAL', '15')
+        try:
+            seconds = float(interval)
+            if not seconds > 0:
+                raise ValueError("must be a positive number of seconds")
+        except ValueError as e:
+            print(f"Not writing metrics to {path}: MDPS_METRICS_INTERVAL={interval!r}: {e}", file=sys.stderr)
+        else:
+            flush_periodically(path, seconds)
@@ -0,0 +1,281 @@
+import os
+import pickle
+import sys
+import threading
+import time
+
+import numpy as np
+
+from compiled_model import LinearModel, compiled_path
+from model_store import ModelStore, file_sha256
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Saved model file for each disease
+MODEL_FILES = {
+    'diabetes': 'diabetes_model.sav',
+    'heart': 'heart_disease_model.sav',
+    'parkinsons': 'parkinsons_model.sav',
+}
+
+class ModelEntry:
+    """A loaded model together with the file state it was loaded from."""
+
+    def __init__(self, name, path, model, mtime, size, sha256, load_seconds, memory_bytes, source='pickle'):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.mtime = mtime
+        self.size = size
+        self.sha256 = sha256
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.source = source
+
+    @property
+    def version(self):
+        return self.sha256[:12]
+
+
+def _nbytes(obj, seen=None):
+    """Approximate memory held by a model: its arrays plus plain attributes."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(getattr(obj, 'nbytes', None), int):
+        # NumPy array; sys.getsizeof already includes the buffer it owns
+        return size if getattr(obj, 'base', None) is None else size + obj.nbytes
+    if isinstance(obj, dict):
+        size += sum(_nbytes(k, seen) + _nbytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_nbytes(v, seen) for v in obj)
+    elif hasattr(obj, '__dict__'):
+        size += _nbytes(vars(obj), seen)
+    return size
+
+
+class ModelRegistry:
+    """Process-wide, lazily populated cache of the saved models.
+
+    Each model is unpickled on first use and then shared by every caller
+    (and every Streamlit session) in the process. The file a model comes from
+    is the current version in the ``ModelStore`` if it has one, otherwise
+    the original ``.sav`` next to the code. At most every ``check_interval``
+    seconds the registry checks whether that file changed (a new current
+    version, or a different mtime or size); if so, and the contents really
+    differ, the new model is loaded, checked against its recorded checksum
+    and warmed up with one prediction on a background thread. Callers keep
+    getting the old model until then, and the swap is a single assignment,
+    so predictions already running finish on the model they started with.
+
+    A model that fails to load is never swapped in: the registry keeps the
+    last good one, or on a cold start falls back to the most recent older
+    version that loads, and remembers the failure (see ``stats``) instead of
+    retrying the same broken file on every check.
+
+    When a compiled ``.npz`` file (see ``compiled_model``) made from the same
+    ``.sav`` contents sits next to it, that is loaded instead, which avoids
+    unpickling and importing scikit-learn altogether.
+    """
+
+    def __init__(self, model_files=None, base_dir=BASE_DIR, check_interval=1.0, prefer_compiled=True,
+                 store=None, background=True):
+        self.model_files = dict(MODEL_FILES if model_files is None else model_files)
+        self.base_dir = base_dir
+        self.check_interval = check_interval
+        self.prefer_compiled = prefer_compiled
+        self.store = store if store is not None else ModelStore(os.path.join(base_dir, 'models'))
+        self.background = background
+        self._entries = {}
+        self._last_checked = {}
+        self._failures = {}
+        self._reloading = set()
+        self._locks = {name: threading.Lock() for name in self.model_files}
+
+    def _target(self, name):
+        """``(path, expected sha256 or None)`` of the file ``name`` should be loaded from."""
+        if name not in self.model_files:
+            raise KeyError(f"Unknown model: {name}")
+        try:
+            stored = self.store.file(name)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring the model store for {name}: {e}", file=sys.stderr)
+            stored = None
+        return stored or (os.path.join(self.base_dir, self.model_files[name]), None)
+
+    def path(self, name):
+        return self._target(name)[0]
+
+    def get(self, name):
+        """Return the model for ``name``, loading or reloading it if needed."""
+        return self.entry(name).model
+
+    def entry(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            with self._locks[name]:
+                entry = self._entries.get(name)
+                if entry is None:
+                    entry = self._entries[name] = self._load_first(name)
+            return entry
+        if self._is_stale(name, entry):
+            if self.background:
+                self._reload_in_background(name)
+            else:
+                self._reload(name)
+        return self._entries[name]
+
+    def _is_stale(self, name, entry, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_checked.get(name, 0.0) < self.check_interval:
+            return False
+        self._last_checked[name] = now
+        path = self.path(name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Keep serving the model we have rather than failing mid-session
+            return False
+        state = (path, st.st_mtime_ns, st.st_size)
+        if state == (entry.path, entry.mtime, entry.size):
+            return False
+        failure = self._failures.get(name)
+        return failure is None or failure['state'] != state
+
+    def _reload_in_background(self, name):
+        with self._locks[name]:
+            if name in self._reloading:
+                return
+            self._reloading.add(name)
+        threading.Thread(target=self._reload, args=(name,), name=f"model-load-{name}", daemon=True).start()
+
+    def _reload(self, name):
+        try:
+            path, expected = self._target(name)
+            try:
+                entry = self._load(name, path, self._entries.get(name), expected)
+            except Exception as e:
+                self._record_failure(name, path, e)
+                return
+            self._failures.pop(name, None)
+            # Atomic swap; callers holding the old entry finish with it
+            self._entries[name] = entry
+        finally:
+            self._reloading.discard(name)
+
+    def _load_first(self, name):
+        """Load the current version, falling back to older ones if it is broken."""
+        path, expected = self._target(name)
+        candidates = [(path, expected)]
+        try:
+            candidates += [c for c in self.store.fallbacks(name) if c[0] != path]
+        except (OSError, ValueError, KeyError):
+            pass
+        original = os.path.join(self.base_dir, self.model_files[name])
+        if all(c[0] != original for c in candidates):
+            candidates.append((original, None))
+        errors = []
+        for candidate, sha256 in candidates:
+            if candidate != path and not os.path.exists(candidate):
+                continue
+            try:
+                entry = self._load(name, candidate, None, sha256)
+            except Exception as e:
+                if candidate == path:
+                    self._record_failure(name, candidate, e)
+                errors.append(f"{candidate}: {e}")
+                continue
+            if candidate != path:
+                print(f"Serving {name} from {candidate} instead", file=sys.stderr)
+            return entry
+        raise RuntimeError(f"Could not load the {name} model: " + '; '.join(errors))
+
+    def _record_failure(self, name, path, error):
+        try:
+            st = os.stat(path)
+            state = (path, st.st_mtime_ns, st.st_size)
+        except OSError:
+            state = (path, None, None)
+        self._failures[name] = {'state': state, 'error': f"{type(error).__name__}: {error}",
+                                'time': time.time()}
+        print(f"Could not load {name} from {path}: {error}", file=sys.stderr)
+
+    def _load(self, name, path, previous=None, expected_sha256=None):
+        st = os.stat(path)
+        sha256 = file_sha256(path)
+        if expected_sha256 is not None and sha256 != expected_sha256:
+            raise ValueError(f"{path} does not match its recorded checksum")
+        if previous is not None and previous.sha256 == sha256:
+            # Touched or copied but unchanged: keep the loaded model, remember the new file
+            previous.path = path
+            previous.mtime = st.st_mtime_ns
+            previous.size = st.st_size
+            return previous
+
+        start = time.perf_counter()
+        model = self._load_compiled(path, sha256) if self.prefer_compiled else None
+        source = 'compiled'
+        if model is None:
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+            source = 'pickle'
+        # One prediction before anyone else uses it, so a model that loads but
+        # cannot score is rejected and the first real request is not the slow one
+        n_features = getattr(model, 'n_features_in_', None)
+        if n_features is not None:
+            model.predict(np.zeros((1, n_features)))
+        load_seconds = time.perf_counter() - start
+        return ModelEntry(name, path, model, st.st_mtime_ns, st.st_size, sha256,
+                          load_seconds, _nbytes(model), source)
+
+    def _load_compiled(self, path, sha256):
+        compiled = compiled_path(path)
+        if not os.path.exists(compiled):
+            return None
+        try:
+            model = LinearModel.load(compiled)
+        except (OSError, KeyError, ValueError):
+            return None
+        # Only trust coefficients compiled from exactly this .sav file
+        return model if model.source_sha256 == sha256 else None
+
+    def invalidate(self, name=None):
+        """Drop one cached model (or all of them) so the next ``get`` reloads it."""
+        names = list(self.model_files) if name is None else [name]
+        for n in names:
+            with self._locks[n]:
+                self._entries.pop(n, None)
+                self._last_checked.pop(n, None)
+                self._failures.pop(n, None)
+
+    def loaded(self):
+        return sorted(self._entries)
+
+    def stats(self):
+        """Load time, memory and any failed reload for every model loaded so far."""
+        return {
+            name: {
+                'path': entry.path,
+                'version': entry.version,
+                'source': entry.source,
+                'load_seconds': entry.load_seconds,
+                'memory_bytes': entry.memory_bytes,
+                'failed': self._failure(name),
+            }
+            for name, entry in sorted(self._entries.items())
+        }
+
+    def _failure(self, name):
+        failure = self._failures.get(name)
+        return None if failure is None else {'path': failure['state'][0], 'error': failure['error']}
+
+
+# Shared by everything imported into this process
+registry = ModelRegistry()
+
+
+def get_model(name):
+    return registry.get(name)
@@ -0,0 +1,178 @@
+"""Several versions of each disease model side by side, with checksums.
+
+    python model_store.py add diabetes retrained_diabetes.sav --activate
+    python model_store.py list diabetes
+    python model_store.py activate diabetes 2d0653abf2d7
+    python model_store.py rollback diabetes
+
+Versions live in ``models/<disease>/<version>.sav``, where the version is
+the first 12 hex digits of the file's SHA-256, next to a ``manifest.json``
+recording each version's full checksum and which one is current. Adding a
+version also compiles it (see ``compiled_model``) when the model is linear.
+
+A running app or inference server notices a new current version within a
+second, loads and warms it in the background and swaps it in; see
+``model_registry``. Until a disease has a current version here, the
+original ``.sav`` file next to the code is used.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+from compiled_model import LinearModel, compiled_path
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+
+def file_sha256(path):
+    """Hex SHA-256 of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelStore:
+    """Versioned model files for every disease under one directory."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _dir(self, name):
+        return os.path.join(self.root, name)
+
+    def manifest(self, name):
+        try:
+            with open(os.path.join(self._dir(name), 'manifest.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'current': None, 'versions': {}}
+
+    def _write_manifest(self, name, manifest):
+        # Write then rename so a reader never sees a half-written manifest
+        path = os.path.join(self._dir(name), 'manifest.json')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def versions(self, name):
+        """``[(version, info)]``, oldest first."""
+        return sorted(self.manifest(name)['versions'].items(), key=lambda item: item[1]['number'])
+
+    def current(self, name):
+        return self.manifest(name)['current']
+
+    def file(self, name, version=None):
+        """``(path, sha256)`` of ``version`` (default: current), or None if there is none."""
+        manifest = self.manifest(name)
+        version = version or manifest['current']
+        info = manifest['versions'].get(version) if version else None
+        if info is None:
+            return None
+        return os.path.join(self._dir(name), info['file']), info['sha256']
+
+    def fallbacks(self, name):
+        """``(path, sha256)`` of every other version, most recently added first."""
+        current = self.current(name)
+        return [self.file(name, version) for version, _ in reversed(self.versions(name)) if version != current]
+
+    def verify(self, name, version):
+        found = self.file(name, version)
+        return found is not None and os.path.exists(found[0]) and file_sha256(found[0]) == found[1]
+
+    def add(self, name, source, activate=False):
+        """Copy the model file ``source`` into the store; returns its version."""
+        sha256 = file_sha256(source)
+        version = sha256[:12]
+        # Refuse files that do not even unpickle before they reach the store
+        with open(source, 'rb') as f:
+            estimator = pickle.load(f)
+        os.makedirs(self._dir(name), exist_ok=True)
+        path = os.path.join(self._dir(name), f"{version}.sav")
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, path)
+        try:
+            LinearModel.from_estimator(estimator, source_sha256=sha256).save(compiled_path(path))
+        except ValueError:
+            pass
+        manifest = self.manifest(name)
+        manifest['versions'].setdefault(version, {
+            'number': len(manifest['versions']) + 1,
+            'file': os.path.basename(path),
+            'sha256': sha256,
+            'source': os.path.abspath(source),
+            'added': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        })
+        if activate:
+            manifest['current'] = version
+        self._write_manifest(name, manifest)
+        return version
+
+    def activate(self, name, version):
+        """Make ``version`` current once its file matches its checksum."""
+        if not self.verify(name, version):
+            raise ValueError(f"{name} version {version} is not in the store or fails its checksum")
+        manifest = self.manifest(name)
+        manifest['current'] = version
+        self._write_manifest(name, manifest)
+
+    def rollback(self, name):
+        """Activate the version added before the current one; returns it."""
+        versions = [version for version, _ in self.versions(name)]
+        current = self.current(name)
+        if current not in versions or versions.index(current) == 0:
+            raise ValueError(f"{name} has no version before {current}")
+        previous = versions[versions.index(current) - 1]
+        self.activate(name, previous)
+        return previous
+
+
+def main(argv=None):
+    from model_registry import MODEL_FILES
+
+    parser = argparse.ArgumentParser(description="Manage versions of the disease models.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add_parser = commands.add_parser('add', help="add a model file as a new version")
+    add_parser.add_argument('disease', choices=sorted(MODEL_FILES))
+    add_parser.add_argument('file', help=".sav file to add")
+    add_parser.add_argument('--activate', action='store_true', help="also make it the current version")
+    list_parser = commands.add_parser('list', help="show the versions of each model")
+    list_parser.add_argument('disease', nargs='?', choices=sorted(MODEL_FILES))
+    activate_parser = commands.add_parser('activate', help="switch to a stored version")
+    activate_parser.add_argument('disease', choices=sorted(MODEL_FILES))
+    activate_parser.add_argument('version')
+    rollback_parser = commands.add_parser('rollback', help="switch back to the previous version")
+    rollback_parser.add_argument('disease', choices=sorted(MODEL_FILES))
+    args = parser.parse_args(argv)
+
+    store = ModelStore()
+    try:
+        if args.command == 'add':
+            version = store.add(args.disease, args.file, args.activate)
+            print(f"Added {args.disease} version {version}{' (current)' if args.activate else ''}")
+        elif args.command == 'activate':
+            store.activate(args.disease, args.version)
+            print(f"{args.disease} is now version {args.version}")
+        elif args.command == 'rollback':
+            print(f"{args.disease} is now version {store.rollback(args.disease)}")
+        else:
+            for name in [args.disease] if args.disease else sorted(MODEL_FILES):
+                current = store.current(name)
+                print(f"{name}: {current or 'original ' + MODEL_FILES[name]}")
+                for version, info in store.versions(name):
+                    ok = 'ok' if store.verify(name, version) else 'CHECKSUM MISMATCH'
+                    print(f"  {'*' if version == current else ' '} {version}  {info['added']}  {ok}  {info['source']}")
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Score very large feature matrices on several worker processes.
+
+    python parallel_score.py score diabetes features.npy predictions.npy --workers 8
+    python parallel_score.py scaling heart --rows 5000000 --max-workers 8
+
+The matrix is never pickled to the workers. An in-memory array is copied
+once into ``multiprocessing.shared_memory`` and a ``.npy`` file is memory
+mapped; either way each worker maps the same buffer, scores the row ranges
+it is handed and writes predictions straight into a shared output buffer.
+Every worker loads the model once, when it starts.
+
+``scaling`` scores the same synthetic matrix with 1 to N workers and reports
+rows/sec and speed-up for each.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from features import SCHEMAS
+from model_registry import registry
+
+DEFAULT_CHUNK_ROWS = 100000
+OUTPUT_DTYPE = np.int64
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def _attach(spec):
+    """Open an array described by ``spec`` without copying it."""
+    kind = spec[0]
+    if kind == 'npy':
+        _, path, mode = spec
+        return np.load(path, mmap_mode=mode), None
+    _, name, shape, dtype = spec
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always tracks; the parent owns and unlinks the block
+        shm = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+
+
+def _init_worker(name, input_spec, output_spec):
+    _worker['model'] = registry.get(name)
+    _worker['input'], _worker['input_shm'] = _attach(input_spec)
+    _worker['output'], _worker['output_shm'] = _attach(output_spec)
+
+
+def _score_range(bounds):
+    start, stop = bounds
+    _worker['output'][start:stop] = _worker['model'].predict(_worker['input'][start:stop])
+    return stop - start
+
+
+def _ranges(rows, chunk_rows):
+    return [(start, min(start + chunk_rows, rows)) for start in range(0, rows, chunk_rows)]
+
+
+def _run(name, rows, input_spec, output_spec, workers, chunk_rows):
+    if name not in SCHEMAS:
+        raise KeyError(f"Unknown model: {name}")
+    with Pool(workers, initializer=_init_worker, initargs=(name, input_spec, output_spec)) as pool:
+        done = sum(pool.imap_unordered(_score_range, _ranges(rows, chunk_rows)))
+    if done != rows:
+        raise RuntimeError(f"Scored {done} of {rows} rows")
+
+
+def parallel_predict(name, X, workers=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Predict every row of ``X`` using ``workers`` processes."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    workers = workers or os.cpu_count()
+    rows = len(X)
+    if rows == 0:
+        return np.empty(0, dtype=OUTPUT_DTYPE)
+    inp = shared_memory.SharedMemory(create=True, size=X.nbytes)
+    out = shared_memory.SharedMemory(create=True, size=rows * np.dtype(OUTPUT_DTYPE).itemsize)
+    try:
+        np.ndarray(X.shape, dtype=X.dtype, buffer=inp.buf)[:] = X
+        _run(name, rows, ('shm', inp.name, X.shape, X.dtype.str),
+             ('shm', out.name, (rows,), np.dtype(OUTPUT_DTYPE).str), workers, chunk_rows)
+        return np.ndarray((rows,), dtype=OUTPUT_DTYPE, buffer=out.buf).copy()
+    finally:
+        for shm in (inp, out):
+            shm.close()
+            shm.unlink()
+
+
+def parallel_predict_npy(name, input_path, output_path, workers=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Score a 2-D ``.npy`` file into a new ``.npy`` file; both are memory mapped."""
+    X = np.load(input_path, mmap_mode='r')
+    if X.ndim != 2 or X.shape[1] != len(SCHEMAS[name]):
+        raise ValueError(f"{input_path} has shape {X.shape}, {name} expects {len(SCHEMAS[name])} columns")
+    rows = len(X)
+    # Create the output file up front; workers then map it and fill their ranges
+    output = np.lib.format.open_memmap(output_path, mode='w+', dtype=OUTPUT_DTYPE, shape=(rows,))
+    del output, X
+    _run(name, rows, ('npy', input_path, 'r'), ('npy', output_path, 'r+'), workers or os.cpu_count(),
+         chunk_rows)
+    return rows
+
+
+def scaling(name, rows, max_workers, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0):
+    """Rows/sec and speed-up of ``parallel_predict`` for 1..``max_workers``."""
+    from benchmark import synthetic_inputs
+
+    X = synthetic_inputs(SCHEMAS[name], rows, seed)
+    model = registry.get(name)
+    # Every row is checked; scoring chunk by chunk keeps the temporaries small
+    expected = np.empty(rows, dtype=OUTPUT_DTYPE)
+    for start in range(0, rows, chunk_rows):
+        expected[start:start + chunk_rows] = model.predict(X[start:start + chunk_rows])
+    results = []
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        predictions = parallel_predict(name, X, workers, chunk_rows)
+        seconds = time.perf_counter() - start
+        if not np.array_equal(predictions, expected):
+            raise RuntimeError(f"Predictions with {workers} workers differ from a single process")
+        results.append({'workers': workers, 'seconds': seconds, 'rows_per_sec': rows / seconds})
+    for r in results:
+        r['speedup'] = results[0]['seconds'] / r['seconds']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score large feature matrices on several processes.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = commands.add_parser('score', help="score a .npy feature matrix")
+    score_parser.add_argument('disease', choices=sorted(SCHEMAS))
+    score_parser.add_argument('input', help=".npy file of shape (rows, features) in schema column order")
+    score_parser.add_argument('output', help=".npy file to write one prediction per row to")
+    score_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    score_parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+
+    scaling_parser = commands.add_parser('scaling', help="measure throughput from 1 to N workers")
+    scaling_parser.add_argument('disease', choices=sorted(SCHEMAS))
+    scaling_parser.add_argument('--rows', type=int, default=5000000)
+    scaling_parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    scaling_parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    scaling_parser.add_argument('--json', help="also write the measurements to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == 'score':
+        start = time.perf_counter()
+        try:
+            rows = parallel_predict_npy(args.disease, args.input, args.output, args.workers, args.chunk_rows)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"error: {e}\n")
+        seconds = time.perf_counter() - start
+        rate = rows / seconds if seconds > 0 else float('inf')
+        print(f"Scored {rows} rows on {args.workers} workers in {seconds:.2f}s ({rate:,.0f} rows/sec)",
+              file=sys.stderr)
+        return
+
+    results = scaling(args.disease, args.rows, args.max_workers, args.chunk_rows)
+    print(f"{'workers':>8} {'seconds':>9} {'rows/sec':>14} {'speed-up':>9}")
+    for r in results:
+        print(f"{r['workers']:>8} {r['seconds']:>9.3f} {r['rows_per_sec']:>14,.0f} {r['speedup']:>9.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'disease': args.disease, 'rows': args.rows, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""Bounded LRU/TTL cache in front of each model's ``predict``.
+
+Entries are keyed on the model's version (the hash of its ``.sav`` file) plus
+a canonical hash of the feature vector, so resubmitted panels and repeated
+Streamlit reruns with the same values skip the model entirely. When the
+registry reports a new version for a model, every entry of the old version is
+dropped.
+
+``SqliteBackend`` optionally keeps entries on disk so they survive restarts;
+set ``MDPS_CACHE_DB`` to a file path to use it for the shared cache. The file
+is bounded too: expired rows are pruned when it is opened and then every
+``prune_interval`` seconds, and beyond ``max_rows`` the oldest rows go.
+"""
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from model_registry import registry as default_registry
+
+DEFAULT_MAXSIZE = 100000
+DEFAULT_TTL = 3600.0
+# Values equal to this many decimals count as the same input
+DEFAULT_DECIMALS = 9
+DEFAULT_MAX_ROWS = 1000000
+DEFAULT_PRUNE_INTERVAL = 300.0
+# Keys per SELECT, below SQLite's default limit of 999 bound parameters
+LOOKUP_BATCH = 500
+
+
+def row_keys(X, decimals=DEFAULT_DECIMALS):
+    """One 16-byte digest per row of ``X`` after canonicalising the values."""
+    X = np.asarray(X, dtype=np.float64)
+    if decimals is not None:
+        X = np.round(X, decimals)
+    # Adding 0.0 turns -0.0 into 0.0 so both hash the same
+    X = np.ascontiguousarray(X + 0.0)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in X]
+
+
+class SqliteBackend:
+    """Persistent second-level store for ``PredictionCache``."""
+
+    def __init__(self, path, max_rows=DEFAULT_MAX_ROWS, prune_interval=DEFAULT_PRUNE_INTERVAL):
+        self.path = path
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "model TEXT NOT NULL, version TEXT NOT NULL, key BLOB NOT NULL, "
+                "value INTEGER NOT NULL, expires REAL, PRIMARY KEY (model, version, key))")
+        self.prune(time.time())
+
+    def get_many(self, model, version, keys, now):
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start:start + LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    "SELECT key, value FROM predictions WHERE model = ? AND version = ? "
+                    f"AND key IN ({', '.join('?' * len(batch))}) AND (expires IS NULL OR expires > ?)",
+                    (model, version, *batch, now))
+                found.update(rows)
+        return found
+
+    def put_many(self, model, version, items, expires):
+        rows = [(model, version, key, int(value), expires) for key, value in items]
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)", rows)
+            # Upper bound: replaced rows are counted again until the next recount
+            self._rows += len(rows)
+            if now - self._pruned >= self.prune_interval:
+                self._prune(now)
+            if self._rows > self.max_rows:
+                self._rows = self._count()
+            excess = self._rows - self.max_rows
+            if excess > 0:
+                # A replaced row gets a new rowid, so the lowest rowids are the oldest rows
+                self._conn.execute(
+                    "DELETE FROM predictions WHERE rowid IN "
+                    "(SELECT rowid FROM predictions ORDER BY rowid LIMIT ?)", (excess,))
+                self._rows = self.max_rows
+
+    def drop_other_versions(self, model, version):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM predictions WHERE model = ? AND version != ?", (model, version))
+            self._rows = self._count()
+
+    def _prune(self, now):
+        # Called with the lock held, inside a transaction
+        self._conn.execute("DELETE FROM predictions WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        self._pruned = now
+        self._rows = self._count()
+
+    def prune(self, now):
+        """Delete the rows that expired before ``now``."""
+        with self._lock, self._conn:
+            self._prune(now)
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM predictions")
+            self._rows = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def close(self):
+        self._conn.close()
+
+
+class PredictionCache:
+    """LRU cache of predictions with optional expiry and disk backend."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, backend=None,
+                 decimals=DEFAULT_DECIMALS, registry=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.decimals = decimals
+        self.registry = registry or default_registry
+        self._entries = collections.OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, name, version):
+        # Called with the lock held
+        if self._versions.get(name) == version:
+            return
+        stale = [k for k in self._entries if k[0] == name and k[1] != version]
+        for k in stale:
+            del self._entries[k]
+        self.invalidations += len(stale)
+        self._versions[name] = version
+        if self.backend is not None:
+            self.backend.drop_other_versions(name, version)
+
+    def lookup(self, name, version, keys):
+        """Return ``{index: prediction}`` for the keys that are cached."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            self._check_version(name, version)
+            for i, key in enumerate(keys):
+                k = (name, version, key)
+                entry = self._entries.get(k)
+                if entry is None:
+                    continue
+                value, expires = entry
+                if expires is not None and expires <= now:
+                    del self._entries[k]
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(k)
+                found[i] = value
+
+        if self.backend is not None and len(found) < len(keys):
+            missing = {key: i for i, key in enumerate(keys) if i not in found}
+            stored = self.backend.get_many(name, version, list(missing), time.time())
+            if stored:
+                self._store(name, version, stored.items())
+                found.update((missing[key], value) for key, value in stored.items())
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _store(self, name, version, items):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._check_version(name, version)
+            for key, value in items:
+                k = (name, version, key)
+                self._entries[k] = (value, expires)
+                self._entries.move_to_end(k)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def store(self, name, version, items):
+        """Cache ``(key, prediction)`` pairs for one model version."""
+        items = [(key, int(value)) for key, value in items]
+        self._store(name, version, items)
+        if self.backend is not None:
+            expires = time.time() + self.ttl if self.ttl is not None else None
+            self.backend.put_many(name, version, items, expires)
+
+    def predict(self, name, X, predict=None):
+        """Predict every row of ``X`` with model ``name``, scoring only cache misses.
+
+        ``predict`` defaults to the registry model's ``predict`` method.
+        """
+        entry = self.registry.entry(name)
+        X = np.asarray(X, dtype=np.float64)
+        keys = row_keys(X, self.decimals)
+        found = self.lookup(name, entry.version, keys)
+        missing = [i for i in range(len(keys)) if i not in found]
+        if not missing:
+            return np.array([found[i] for i in range(len(keys))])
+
+        predictions = (predict or entry.model.predict)(X[missing])
+        self.store(name, entry.version, zip((keys[i] for i in missing), predictions))
+        result = np.empty(len(keys), dtype=predictions.dtype)
+        result[missing] = predictions
+        for i, value in found.items():
+            result[i] = value
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'backend': self.backend.path if self.backend is not None else None,
+            }
+
+
+def _default_cache():
+    path = os.environ.get('MDPS_CACHE_DB')
+    return PredictionCache(backend=SqliteBackend(path) if path else None)
+
+
+# Shared by the app, the batch scorer and the HTTP service in this process
+cache = _default_cache()
+
+
+def cached_predict(name, X):
+    return cache.predict(name, X)
@@ -0,0 +1,112 @@
+"""Static page pieces, built once per process and reused by every rerun.
+
+The stylesheet and logo are bundled in ``assets/`` and read once; the CSS is
+minified before it is sent so each rerun ships as few bytes as possible, and
+the logo is served by Streamlit itself rather than fetched from an outside
+host. The home page text and each disease page's field descriptions are
+built once, and the descriptions are only rendered when the user asks for
+them.
+"""
+import functools
+import os
+import re
+
+import streamlit as st
+
+from features import SCHEMAS
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+CSS_PATH = os.path.join(ASSETS_DIR, 'style.css')
+LOGO_PATH = os.path.join(ASSETS_DIR, 'logo.png')
+
+HOME_TITLE = "Welcome to Test Report Interpreter - Your Early Disease Detection Tool"
+
+HOME_INTRO = """
+### 🩺 **About EarlyMed**
+EarlyMed is a platform designed by a team of VIT-AP University to help you understand your medical test results before visiting a doctor.
+If you've recently undergone medical tests at a pathology lab but haven't had the chance to consult a doctor yet,
+this tool can provide you with preliminary insights into your health.
+
+### 🎯 **What will we do in this Test Report Interpreter?**
+If you've been diagnosed with any of the following diseases and have received your lab test report but haven't had the chance to consult a doctor yet, we're here to help. Currently, we support three diseases, but more disorders will be added soon!
+1. **Diabetes**: Predicts the likelihood of diabetes based on factors like glucose levels, blood pressure, and BMI.
+2. **Heart Disease**: Assesses the risk of heart disease using parameters like cholesterol levels, blood pressure, and ECG results.
+3. **Parkinson's Disease**: Evaluates the possibility of Parkinson's disease using voice analysis and other biomarkers.
+
+### 🧪 **How to Use EarlyMed**
+To get started, you'll need the results of certain medical tests. If you haven't undergone these tests yet,
+we recommend visiting a nearby diagnostic center or pathology lab. Here are some common tests you might need:
+
+#### Common Tests and Their Purposes:
+- **Lipid Profile**: Measures cholesterol levels (e.g., LDL, HDL, triglycerides) to assess heart health.
+- **Blood Sugar Test**: Measures glucose levels to check for diabetes or prediabetes.
+- **ECG (Electrocardiogram)**: Records the electrical activity of the heart to detect heart disease.
+- **Voice Analysis**: Used for Parkinson's disease diagnosis by analyzing vocal patterns.
+- **Complete Blood Count (CBC)**: Provides an overview of your overall health and detects various disorders.
+
+These values are typically included in standard medical reports. If you already have your test results,
+you can proceed to the respective disease prediction section from the sidebar.
+
+### ⚠️ **Important Note**
+EarlyMed is not a substitute for professional medical advice. Always consult a qualified healthcare provider
+for a comprehensive diagnosis and treatment plan.
+"""
+
+HOME_GET_STARTED = """
+### 🚀 **Get Started**
+Use the sidebar to navigate to the disease prediction section of your choice. Enter your test results,
+and EarlyMed will provide you with a preliminary assessment.
+"""
+
+
+def _minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};:,>])\s*', r'\1', css).replace(';}', '}').strip()
+
+
+@functools.lru_cache(maxsize=None)
+def _style_tag():
+    with open(CSS_PATH, encoding='utf-8') as f:
+        return f"<style>{_minify_css(f.read())}</style>"
+
+
+@functools.lru_cache(maxsize=None)
+def _logo():
+    with open(LOGO_PATH, 'rb') as f:
+        return f.read()
+
+
+def inject_css():
+    st.markdown(_style_tag(), unsafe_allow_html=True)
+
+
+def logo(width=200):
+    st.image(_logo(), width=width)
+
+
+@functools.lru_cache(maxsize=None)
+def field_descriptions(name):
+    """Markdown describing every input of the ``name`` model."""
+    schema = SCHEMAS[name]
+    terms = "\n".join(f"- **{f.term}**: {f.description}" for f in schema.features)
+    return (
+        "### Understanding the Input Fields:\n"
+        "Below are the descriptions of the terms used in this prediction model. "
+        "Please provide accurate values for better results.\n\n" + terms
+    )
+
+
+def field_help(name):
+    """Field descriptions, rendered only while the user has them switched on."""
+    if st.toggle("Show descriptions of the input fields", key=f"help_{name}"):
+        st.markdown(field_descriptions(name))
+
+
+def home_page():
+    logo()
+    st.title(HOME_TITLE)
+    st.markdown(HOME_INTRO)
+    st.markdown(HOME_GET_STARTED)
+    st.markdown("---")
+    st.markdown("© 2025 EarlyMed. All rights reserved.")
@@ -0,0 +1,274 @@
+"""Risk scores and triage ranking for whole cohorts.
+
+    python risk_scoring.py score heart cohort.csv scores.csv --top 100
+    python risk_scoring.py calibrate diabetes labelled.csv --label-column Outcome
+
+The pages only show a 0/1 label. ``risk_scores`` gives every row its
+decision margin (signed distance from the model's boundary, larger is more
+at risk) and, where the model has one, a probability of the positive class.
+Heart disease is a logistic regression, so its probability is the sigmoid of
+the margin, exactly ``predict_proba``. The diabetes and Parkinson's SVCs
+were trained without probability estimates; ``calibrate`` fits a Platt
+sigmoid to their margins on labelled data and keeps it in
+``calibration.json``, tied to the ``.sav`` file it was fitted for. Until
+then they are ranked by margin alone.
+
+Everything works on whole arrays: one ``decision_function`` call per batch,
+the calibration applied to the batch at once, and ``top_k`` picks the
+highest-risk rows with ``argpartition`` instead of sorting the cohort.
+"""
+import argparse
+import csv
+import dataclasses
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from batch_score import DEFAULT_CHUNK_SIZE, is_parquet, iter_csv_chunks, iter_parquet_chunks
+from combined import get_executor
+from features import SCHEMAS
+from model_registry import BASE_DIR, registry as default_registry
+
+CALIBRATION_PATH = os.path.join(BASE_DIR, 'calibration.json')
+
+
+def _expit(z):
+    # 1 / (1 + exp(-z)) without overflowing for large |z|
+    return np.exp(-np.logaddexp(0.0, -z))
+
+
+@dataclasses.dataclass(frozen=True)
+class Platt:
+    """Platt sigmoid ``P(positive) = 1 / (1 + exp(a * margin + b))``."""
+
+    a: float
+    b: float
+    source_sha256: str = ''
+    rows: int = 0
+
+    def __call__(self, margins):
+        return _expit(-(self.a * np.asarray(margins, dtype=np.float64) + self.b))
+
+
+def fit_platt(margins, labels, max_iter=100, min_step=1e-10, sigma=1e-12):
+    """Fit ``Platt`` parameters by Newton's method with a backtracking line search.
+
+    Follows Lin, Lin and Weng (2007), including Platt's smoothed targets so
+    that a perfectly separated set does not push the sigmoid to a step. Each
+    iteration is a handful of reductions over the whole array. ``labels``
+    must be 0 or 1, with 1 the positive class.
+    """
+    f = np.asarray(margins, dtype=np.float64)
+    labels = np.asarray(labels)
+    if f.shape != labels.shape or f.ndim != 1:
+        raise ValueError("margins and labels must be 1-D arrays of the same length")
+    unexpected = labels[~np.isin(labels, [0, 1])]
+    if len(unexpected):
+        raise ValueError(f"Labels must be 0 or 1, found {', '.join(map(str, np.unique(unexpected)[:5]))}")
+    positive = labels == 1
+    prior1 = int(positive.sum())
+    prior0 = len(f) - prior1
+    if prior1 == 0 or prior0 == 0:
+        raise ValueError("Calibration needs both positive and negative examples")
+    t = np.where(positive, (prior1 + 1.0) / (prior1 + 2.0), 1.0 / (prior0 + 2.0))
+
+    def objective(a, b):
+        fApB = a * f + b
+        return float(np.sum(t * fApB + np.logaddexp(0.0, -fApB)))
+
+    a, b = 0.0, float(np.log((prior0 + 1.0) / (prior1 + 1.0)))
+    fval = objective(a, b)
+    for _ in range(max_iter):
+        p = _expit(-(a * f + b))
+        d2 = p * (1.0 - p)
+        h11 = sigma + float(np.dot(f * f, d2))
+        h22 = sigma + float(d2.sum())
+        h21 = float(np.dot(f, d2))
+        d1 = t - p
+        g1 = float(np.dot(f, d1))
+        g2 = float(d1.sum())
+        if abs(g1) < 1e-5 and abs(g2) < 1e-5:
+            break
+        det = h11 * h22 - h21 * h21
+        da = -(h22 * g1 - h21 * g2) / det
+        db = -(-h21 * g1 + h11 * g2) / det
+        gd = g1 * da + g2 * db
+        step = 1.0
+        while step >= min_step:
+            new_a, new_b = a + step * da, b + step * db
+            new_fval = objective(new_a, new_b)
+            if new_fval < fval + 1e-4 * step * gd:
+                a, b, fval = new_a, new_b, new_fval
+                break
+            step /= 2.0
+        else:
+            break
+    return Platt(a, b, rows=len(f))
+
+
+def load_calibrations(path=CALIBRATION_PATH):
+    """``{model: Platt}`` from ``path``; empty if nothing has been calibrated."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {name: Platt(**params) for name, params in data.items()}
+
+
+def save_calibration(name, platt, path=CALIBRATION_PATH):
+    calibrations = load_calibrations(path)
+    calibrations[name] = platt
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({n: dataclasses.asdict(p) for n, p in sorted(calibrations.items())}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _is_logistic(model):
+    return getattr(model, 'kind', type(model).__name__) == 'LogisticRegression'
+
+
+def risk_scores(name, X, registry=default_registry, calibrations=None):
+    """``(margins, probabilities)`` for every row of ``X``.
+
+    ``probabilities`` is None when the model has no probability scale, i.e.
+    an SVC that has not been calibrated for the current ``.sav`` file.
+    """
+    entry = registry.entry(name)
+    margins = entry.model.decision_function(np.asarray(X, dtype=np.float64))
+    if _is_logistic(entry.model):
+        # Same as predict_proba(X)[:, 1] for a binary logistic regression
+        return margins, _expit(margins)
+    if calibrations is None:
+        calibrations = load_calibrations()
+    platt = calibrations.get(name)
+    if platt is None or platt.source_sha256 != entry.sha256:
+        return margins, None
+    return margins, platt(margins)
+
+
+def score_models(inputs, registry=default_registry, calibrations=None):
+    """Risk scores for several models at once, e.g. ``{'heart': X1, 'diabetes': X2}``.
+
+    The models run concurrently; returns ``{model: (margins, probabilities)}``.
+    """
+    if calibrations is None:
+        calibrations = load_calibrations()
+    futures = {name: get_executor().submit(risk_scores, name, X, registry, calibrations)
+               for name, X in inputs.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def top_k(scores, k):
+    """Indices of the ``k`` highest scores, highest first; NaN ranks last.
+
+    Only the selected rows are sorted, so this is linear in the cohort size.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    keys = np.where(np.isnan(scores), -np.inf, scores)
+    chosen = np.argpartition(-keys, k - 1)[:k]
+    return chosen[np.argsort(-keys[chosen], kind='stable')]
+
+
+def score_file(name, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, id_column=None, top=0,
+               registry=default_registry):
+    """Write the margin and probability of every row and track the ``top`` riskiest.
+
+    Returns ``(rows, seconds, ranked)`` where ``ranked`` is a list of
+    ``(id, score)`` for the highest-risk rows, highest first.
+    """
+    schema = SCHEMAS[name]
+    classes = registry.entry(name).model.classes_
+    calibrations = load_calibrations()
+    read = iter_parquet_chunks if is_parquet(input_path) else iter_csv_chunks
+    best_ids, best_scores = np.empty(0, dtype=object), np.empty(0)
+    rows = 0
+    start = time.perf_counter()
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([id_column or 'row', 'prediction', 'margin', 'probability'])
+        for ids, X in read(input_path, schema.columns, chunk_size, id_column):
+            schema.validate(X, rows)
+            margins, probabilities = risk_scores(name, X, registry, calibrations)
+            # The same labels predict() gives, without a second pass over X
+            predictions = classes[(margins > 0).astype(np.intp)]
+            probability_column = [''] * len(X) if probabilities is None else probabilities.tolist()
+            writer.writerows(zip(ids, predictions.tolist(), margins.tolist(), probability_column))
+            if top:
+                # Keep only the running top ``top`` rather than every score
+                candidates = np.concatenate([best_scores, margins if probabilities is None else probabilities])
+                candidate_ids = np.concatenate([best_ids, np.array(list(ids), dtype=object)])
+                keep = top_k(candidates, top)
+                best_ids, best_scores = candidate_ids[keep], candidates[keep]
+            rows += len(X)
+    return rows, time.perf_counter() - start, list(zip(best_ids.tolist(), best_scores.tolist()))
+
+
+def calibrate(name, input_path, label_column, chunk_size=DEFAULT_CHUNK_SIZE, registry=default_registry):
+    """Fit a ``Platt`` sigmoid for ``name`` from a labelled CSV or Parquet file."""
+    schema = SCHEMAS[name]
+    entry = registry.entry(name)
+    read = iter_parquet_chunks if is_parquet(input_path) else iter_csv_chunks
+    margins, labels = [], []
+    for _, values in read(input_path, schema.columns + [label_column], chunk_size):
+        X, y = values[:, :-1], values[:, -1]
+        schema.validate(X, sum(len(m) for m in margins))
+        margins.append(entry.model.decision_function(np.ascontiguousarray(X)))
+        labels.append(y)
+    if not margins:
+        raise ValueError(f"{input_path} has no rows")
+    platt = fit_platt(np.concatenate(margins), np.concatenate(labels))
+    return dataclasses.replace(platt, source_sha256=entry.sha256)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Risk scores and triage ranking for cohorts.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = commands.add_parser('score', help="write margins and probabilities for a file")
+    score_parser.add_argument('disease', choices=sorted(SCHEMAS))
+    score_parser.add_argument('input', help="CSV or Parquet file with one patient per row")
+    score_parser.add_argument('output', help="CSV file to write the scores to")
+    score_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    score_parser.add_argument('--id-column', help="input column copied to the output to identify each row")
+    score_parser.add_argument('--top', type=int, default=0, help="print the N highest-risk rows")
+
+    calibrate_parser = commands.add_parser('calibrate', help="fit a probability scale from labelled data")
+    calibrate_parser.add_argument('disease', choices=sorted(SCHEMAS))
+    calibrate_parser.add_argument('input', help="CSV or Parquet file with the model's columns and a label")
+    calibrate_parser.add_argument('--label-column', required=True, help="column holding the 0/1 outcome")
+    calibrate_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    if args.command == 'calibrate':
+        try:
+            platt = calibrate(args.disease, args.input, args.label_column, args.chunk_size)
+        except (OSError, RuntimeError, ValueError) as e:
+            parser.exit(1, f"error: {e}\n")
+        save_calibration(args.disease, platt)
+        print(f"Calibrated {args.disease} on {platt.rows} rows: a={platt.a:.6g}, b={platt.b:.6g} "
+              f"-> {CALIBRATION_PATH}")
+        return
+
+    try:
+        rows, seconds, ranked = score_file(args.disease, args.input, args.output, args.chunk_size,
+                                           args.id_column, args.top)
+    except (OSError, RuntimeError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    rate = rows / seconds if seconds > 0 else float('inf')
+    print(f"Scored {rows} rows in {seconds:.2f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+    for rank, (row_id, score) in enumerate(ranked, 1):
+        print(f"{rank:>5} {row_id} {score:.6g}")
+
+
+if __name__ == '__main__':
+    main()
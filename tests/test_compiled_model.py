@@ -0,0 +1,41 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from compiled_model import LinearModel, check, compiled_path
+from model_registry import BASE_DIR, MODEL_FILES, ModelRegistry
+from model_store import ModelStore, file_sha256
+
+
+@pytest.fixture
+def registry(tmp_path):
+    # An empty store, so the shipped .sav files are what gets compared
+    return ModelRegistry(store=ModelStore(str(tmp_path / 'models')), background=False)
+
+
+@pytest.mark.parametrize('name', sorted(MODEL_FILES))
+def test_shipped_npz_matches_its_sav_file(name):
+    path = os.path.join(BASE_DIR, MODEL_FILES[name])
+    assert LinearModel.load(compiled_path(path)).source_sha256 == file_sha256(path)
+
+
+@pytest.mark.parametrize('name', sorted(MODEL_FILES))
+def test_compiled_model_agrees_with_scikit_learn(registry, name):
+    mismatches, diff = check([name], rows=20000, registry=registry)[name]
+    assert mismatches == 0
+    # Only summation order differs, over inputs as large as a few hundred
+    assert diff < 1e-6
+
+
+def test_save_and_load_round_trip(tmp_path):
+    with open(os.path.join(BASE_DIR, MODEL_FILES['heart']), 'rb') as f:
+        estimator = pickle.load(f)
+    model = LinearModel.from_estimator(estimator, source_sha256='abc')
+    model.save(str(tmp_path / 'heart.npz'))
+    loaded = LinearModel.load(str(tmp_path / 'heart.npz'))
+    X = np.random.default_rng(0).uniform(0, 200, size=(100, estimator.n_features_in_))
+    assert np.array_equal(loaded.decision_function(X), model.decision_function(X))
+    assert np.allclose(loaded.predict_proba(X), estimator.predict_proba(X))
+    assert loaded.source_sha256 == 'abc'
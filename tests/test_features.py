@@ -0,0 +1,27 @@
+import pytest
+
+from features import SCHEMAS, Feature
+
+HEART = SCHEMAS['heart']
+
+
+def test_to_array_accepts_rows_mappings_and_one_flat_row():
+    row = list(range(len(HEART)))
+    assert HEART.to_array([row, row]).shape == (2, len(HEART))
+    assert HEART.to_array([dict(zip(HEART.columns, row))]).tolist() == [row]
+    assert HEART.to_array(row).shape == (1, len(HEART))
+
+
+@pytest.mark.parametrize('records', [
+    [[1]] * 13,
+    list(range(26)),
+    [list(range(12))],
+])
+def test_to_array_rejects_other_shapes(records):
+    with pytest.raises(ValueError, match='features per row'):
+        HEART.to_array(records)
+
+
+def test_normal_range_must_lie_within_bounds():
+    with pytest.raises(ValueError, match='normal range'):
+        Feature('x', 'X', float, 0, 1, normal=(0, 2))
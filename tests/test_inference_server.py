@@ -0,0 +1,55 @@
+import asyncio
+import types
+
+import numpy as np
+
+import inference_server
+
+
+class FirstColumn:
+    def predict(self, X):
+        return X[:, 0].astype(np.int64)
+
+
+def test_micro_batch_returns_each_caller_its_own_rows(monkeypatch):
+    entry = types.SimpleNamespace(version='v1', model=FirstColumn())
+    monkeypatch.setattr(inference_server, 'registry', types.SimpleNamespace(entry=lambda name: entry))
+    requests = [np.arange(n * 2, dtype=np.float64).reshape(n, 2) + 100 * n for n in (1, 3, 2)]
+
+    async def run():
+        batcher = inference_server.MicroBatcher('heart', max_batch=6, max_wait=0.5)
+        try:
+            return await asyncio.gather(*(batcher.predict(X) for X in requests)), batcher
+        finally:
+            await batcher.stop()
+
+    results, batcher = asyncio.run(run())
+    for X, (predictions, version) in zip(requests, results):
+        assert predictions.tolist() == X[:, 0].astype(np.int64).tolist()
+        assert version == 'v1'
+    assert list(batcher.batch_sizes) == [6]
+
+
+def test_invalid_content_length_is_a_bad_request():
+    async def run():
+        service = inference_server.InferenceService(cache=None)
+        server = await asyncio.start_server(
+            lambda r, w: inference_server._serve_connection(service, r, w, 1 << 16), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            responses = []
+            for length in ('abc', '-5'):
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f"POST /predict/heart HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+                await writer.drain()
+                responses.append(await reader.read())
+                writer.close()
+            return responses
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.close()
+
+    for response in asyncio.run(run()):
+        assert response.startswith(b'HTTP/1.1 400 Bad Request')
+        assert b'Content-Length must be' in response
@@ -0,0 +1,93 @@
+import copy
+import os
+import pickle
+import shutil
+import time
+
+import pytest
+
+from model_registry import ModelRegistry
+from model_store import ModelStore
+
+HEART = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'heart_disease_model.sav')
+
+
+@pytest.fixture
+def models(tmp_path):
+    """Two different versions of the heart model, outside the store."""
+    first = tmp_path / 'first.sav'
+    shutil.copyfile(HEART, first)
+    with open(HEART, 'rb') as f:
+        estimator = pickle.load(f)
+    second = copy.deepcopy(estimator)
+    second.coef_ = -second.coef_
+    with open(tmp_path / 'second.sav', 'wb') as f:
+        pickle.dump(second, f)
+    return str(first), str(tmp_path / 'second.sav')
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ModelStore(str(tmp_path / 'models'))
+
+
+def make_registry(tmp_path, store, background=False):
+    base_dir = tmp_path / 'base'
+    base_dir.mkdir(exist_ok=True)
+    shutil.copyfile(HEART, base_dir / 'heart_disease_model.sav')
+    return ModelRegistry({'heart': 'heart_disease_model.sav'}, str(base_dir), check_interval=0.0,
+                         prefer_compiled=False, store=store, background=background)
+
+
+def test_swaps_in_new_current_version(tmp_path, store, models):
+    first = store.add('heart', models[0], activate=True)
+    registry = make_registry(tmp_path, store)
+    assert registry.entry('heart').version == first
+
+    second = store.add('heart', models[1], activate=True)
+    assert registry.entry('heart').version == second
+    assert registry.stats()['heart']['failed'] is None
+
+
+def test_reloads_in_background(tmp_path, store, models):
+    first = store.add('heart', models[0], activate=True)
+    registry = make_registry(tmp_path, store, background=True)
+    assert registry.entry('heart').version == first
+
+    second = store.add('heart', models[1], activate=True)
+    deadline = time.monotonic() + 10
+    while registry.entry('heart').version != second:
+        assert time.monotonic() < deadline, "the new version was never swapped in"
+        time.sleep(0.01)
+
+
+def test_rejects_file_that_fails_its_checksum(tmp_path, store, models):
+    first = store.add('heart', models[0], activate=True)
+    second = store.add('heart', models[1])
+    registry = make_registry(tmp_path, store)
+    assert registry.entry('heart').version == first
+
+    store.activate('heart', second)
+    # Replace the stored file after activation, as a bad copy would
+    path, _ = store.file('heart', second)
+    shutil.copyfile(models[0], path)
+    assert registry.entry('heart').version == first
+    assert 'checksum' in registry.stats()['heart']['failed']['error']
+
+
+def test_cold_start_falls_back_to_older_version(tmp_path, store, models):
+    first = store.add('heart', models[0])
+    second = store.add('heart', models[1], activate=True)
+    path, _ = store.file('heart', second)
+    with open(path, 'wb') as f:
+        f.write(b'not a pickle')
+
+    registry = make_registry(tmp_path, store)
+    assert registry.entry('heart').version == first
+    assert registry.stats()['heart']['failed'] is not None
+
+
+def test_cold_start_without_store_uses_original_file(tmp_path, store):
+    registry = make_registry(tmp_path, store)
+    entry = registry.entry('heart')
+    assert entry.path == os.path.join(registry.base_dir, 'heart_disease_model.sav')
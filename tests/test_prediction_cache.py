@@ -0,0 +1,68 @@
+import types
+
+import numpy as np
+
+from prediction_cache import PredictionCache, SqliteBackend, row_keys
+
+
+class FirstColumn:
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return X[:, 0].astype(np.int64)
+
+
+class FakeRegistry:
+    def __init__(self, version):
+        self.version = version
+        self.model = FirstColumn()
+
+    def entry(self, name):
+        return types.SimpleNamespace(version=self.version, model=self.model)
+
+
+def test_new_model_version_invalidates_entries():
+    registry = FakeRegistry('v1')
+    cache = PredictionCache(registry=registry)
+    X = np.array([[1.0, 2.0], [0.0, 5.0]])
+    assert cache.predict('heart', X).tolist() == [1, 0]
+    assert cache.predict('heart', X).tolist() == [1, 0]
+    assert registry.model.rows == 2
+
+    registry.version = 'v2'
+    assert cache.predict('heart', X).tolist() == [1, 0]
+    assert registry.model.rows == 4
+    assert cache.stats()['invalidations'] == 2
+    assert cache.lookup('heart', 'v1', row_keys(X)) == {}
+
+
+def test_sqlite_backend_drops_old_versions_and_batches_lookups(tmp_path):
+    backend = SqliteBackend(str(tmp_path / 'cache.sqlite'))
+    keys = row_keys(np.arange(2000, dtype=np.float64).reshape(-1, 1))
+    backend.put_many('heart', 'v1', [(key, i % 2) for i, key in enumerate(keys)], None)
+    found = backend.get_many('heart', 'v1', keys, 0.0)
+    assert [found[key] for key in keys] == [i % 2 for i in range(2000)]
+
+    backend.drop_other_versions('heart', 'v2')
+    assert len(backend) == 0
+
+
+def test_sqlite_backend_is_bounded(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    backend = SqliteBackend(path, max_rows=100)
+    keys = row_keys(np.arange(150, dtype=np.float64).reshape(-1, 1))
+    backend.put_many('heart', 'v1', [(key, 1) for key in keys[:50]], 10.0)
+    backend.put_many('heart', 'v1', [(key, 1) for key in keys[50:]], None)
+    assert len(backend) == 100
+    # The oldest rows went first
+    assert keys[0] not in backend.get_many('heart', 'v1', keys, 0.0)
+    backend.close()
+
+    # Rows that expired are pruned when the file is opened again
+    backend = SqliteBackend(path, max_rows=100)
+    assert len(backend) == 100
+    backend.put_many('heart', 'v1', [(keys[0], 1)], 1.0)
+    backend.close()
+    assert len(SqliteBackend(path, max_rows=100)) == 99
@@ -0,0 +1,88 @@
+import csv
+import os
+import pickle
+import types
+
+import numpy as np
+import pytest
+
+from model_registry import BASE_DIR, MODEL_FILES, ModelRegistry
+from model_store import ModelStore
+from features import SCHEMAS
+from risk_scoring import Platt, _expit, fit_platt, risk_scores, score_file, top_k
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(store=ModelStore(str(tmp_path / 'models')), background=False)
+
+
+def test_fit_platt_recovers_known_sigmoid():
+    rng = np.random.default_rng(0)
+    margins = rng.uniform(-4, 4, 50000)
+    labels = (rng.random(len(margins)) < _expit(1.5 * margins - 0.5)).astype(int)
+    platt = fit_platt(margins, labels)
+    assert platt.a == pytest.approx(-1.5, abs=0.05)
+    assert platt.b == pytest.approx(0.5, abs=0.05)
+    assert platt.rows == len(margins)
+
+
+@pytest.mark.parametrize('labels', [[1, 2, 1, 2], [0, 0, 0, 0]])
+def test_fit_platt_rejects_unusable_labels(labels):
+    with pytest.raises(ValueError):
+        fit_platt(np.array([-2.0, -1.0, 1.0, 2.0]), np.array(labels))
+
+
+def test_top_k_orders_highest_first_with_nan_last():
+    scores = np.array([0.2, np.nan, 0.9, 0.5, 0.9])
+    assert top_k(scores, 2).tolist() == [2, 4]
+    assert top_k(scores, 10).tolist() == [2, 4, 3, 0, 1]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_logistic_risk_is_predict_proba(registry):
+    with open(os.path.join(BASE_DIR, MODEL_FILES['heart']), 'rb') as f:
+        estimator = pickle.load(f)
+    X = np.random.default_rng(0).uniform(0, 3, size=(50, estimator.n_features_in_))
+    margins, probabilities = risk_scores('heart', X, registry, calibrations={})
+    assert np.allclose(margins, estimator.decision_function(X))
+    assert np.allclose(probabilities, estimator.predict_proba(X)[:, 1])
+
+
+def test_svc_risk_needs_calibration_for_the_same_file(registry):
+    entry = registry.entry('diabetes')
+    X = np.zeros((3, entry.model.n_features_in_))
+    margins, probabilities = risk_scores('diabetes', X, registry, calibrations={})
+    assert probabilities is None
+
+    platt = Platt(-1.0, 0.0, source_sha256=entry.sha256)
+    _, probabilities = risk_scores('diabetes', X, registry, calibrations={'diabetes': platt})
+    assert np.allclose(probabilities, _expit(margins))
+
+    stale = Platt(-1.0, 0.0, source_sha256='0' * 64)
+    assert risk_scores('diabetes', X, registry, calibrations={'diabetes': stale})[1] is None
+
+
+class FirstColumnMargin:
+    kind = 'LinearSVC'
+    classes_ = np.array([-1, 1])
+
+    def decision_function(self, X):
+        return X[:, 0] - 50
+
+
+def test_score_file_uses_the_model_classes(tmp_path):
+    entry = types.SimpleNamespace(model=FirstColumnMargin(), sha256='0' * 64)
+    registry = types.SimpleNamespace(entry=lambda name: entry)
+    schema = SCHEMAS['heart']
+    with open(tmp_path / 'in.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(schema.columns)
+        for age in (30, 70):
+            writer.writerow([age] + [f.default for f in schema.features[1:]])
+    rows, _, ranked = score_file('heart', str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), top=1,
+                                 registry=registry)
+    with open(tmp_path / 'out.csv', newline='') as f:
+        assert [r['prediction'] for r in csv.DictReader(f)] == ['-1', '1']
+    assert rows == 2
+    assert ranked == [(1, 20.0)]